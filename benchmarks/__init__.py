@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The client modules use flat imports (`import config`), like when run
+# from their own directory.
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _d in ("fake_time_server", os.path.join("displays", "display_tool")):
+    _p = os.path.join(_ROOT, _d)
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+
+from . import bench_client, bench_display
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+# A case may be this many times its measured spread slower before --check
+# calls it a regression, on top of --threshold
+NOISE_FACTOR = 3
+
+
+def _number(timer: timeit.Timer, min_time: float) -> int:
+    number, _ = timer.autorange()
+    return max(1, int(number * min_time / 0.2))
+
+
+def _time(fn, calibration: timeit.Timer, calibration_number: int, repeat: int, min_time: float):
+    """(median seconds per call, median time / calibration, spread).
+
+    Each of the `repeat` runs (at least `min_time` long) is paired with a
+    calibration run right before it, so a machine that slows down for a
+    while slows both sides of the ratio. spread is the interquartile range
+    of the ratios over their median.
+    """
+    timer = timeit.Timer(fn)
+    number = _number(timer, min_time)
+    secs, ratios = [], []
+    for _ in range(max(repeat, 3)):
+        cal = calibration.timeit(calibration_number) / calibration_number
+        sec = timer.timeit(number) / number
+        secs.append(sec)
+        ratios.append(sec / cal)
+    q1, ratio, q3 = statistics.quantiles(ratios, n=4)
+    return statistics.median(secs), ratio, (q3 - q1) / ratio
+
+
+def _calibration_work() -> int:
+    # Fixed pure-Python mix (dict, str, int) close to what the cases do
+    d = {}
+    for i in range(2000):
+        d[str(i)] = i * i
+    return sum(d.values())
+
+
+def _load_baseline(path: str):
+    """(calibration seconds, {case: time / calibration}, {case: spread}),
+    or (None, {}, {})."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+    except (OSError, ValueError):
+        return None, {}, {}
+    if not isinstance(obj, dict) or "cases" not in obj:
+        return None, {}, {}  # old absolute-seconds format, not comparable
+    return obj.get("calibration"), obj["cases"], obj.get("noise", {})
+
+
+def _fmt(sec: float) -> str:
+    if sec < 1e-3:
+        return f"{sec * 1e6:.2f} µs"
+    if sec < 1:
+        return f"{sec * 1e3:.2f} ms"
+    return f"{sec:.2f} s"
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks",
+                                description="Client and display hot-path benchmarks")
+    p.add_argument("-k", "--filter", default="", help="Only run cases whose name contains this")
+    p.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file")
+    p.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    p.add_argument("--check", action="store_true",
+                   help="Exit 1 if a case is slower than its baseline by more than --threshold "
+                        f"plus {NOISE_FACTOR}x its measured spread")
+    p.add_argument("--threshold", type=float, default=0.3,
+                   help="With --check: allowed slowdown against the baseline, as a fraction")
+    p.add_argument("--repeat", type=int, default=9, help="Timing runs per case; the median is used")
+    p.add_argument("--min-time", type=float, default=0.1, help="Seconds per timing run")
+    args = p.parse_args(argv)
+
+    # Cases are compared as multiples of a calibration loop timed alongside
+    # them, so a baseline saved on one machine holds on a faster or slower
+    # one; medians of paired runs and a per-case noise floor keep --check
+    # quiet on an unchanged tree
+    _, baseline, baseline_noise = _load_baseline(args.baseline)
+    cal_timer = timeit.Timer(_calibration_work)
+    cal_number = _number(cal_timer, args.min_time / 2)
+    calibration = cal_timer.timeit(cal_number) / cal_number
+    print(f"{'calibration':36} {_fmt(calibration):>12}", flush=True)
+
+    results = {}
+    noise = {}
+    regressions = []
+    for name, fn in (*bench_client.cases(), *bench_display.cases()):
+        if args.filter not in name:
+            continue
+        sec, results[name], noise[name] = _time(fn, cal_timer, cal_number, args.repeat, args.min_time)
+        base = baseline.get(name)
+        note = f"±{noise[name]:4.0%}"
+        if base:
+            ratio = results[name] / base
+            allowed = args.threshold + NOISE_FACTOR * max(noise[name], baseline_noise.get(name, 0.0))
+            note += f"  {ratio:5.2f}x"
+            if ratio > 1 + allowed:
+                note += "  REGRESSION"
+                regressions.append(name)
+        print(f"{name:36} {_fmt(sec):>12}   {note}", flush=True)
+
+    if args.save:
+        baseline.update(results)
+        baseline_noise.update(noise)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"calibration": calibration, "cases": dict(sorted(baseline.items())),
+                       "noise": dict(sorted(baseline_noise.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions and args.check:
+        print(f"{len(regressions)} case(s) slower than baseline by more than "
+              f"{args.threshold:.0%} plus noise: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
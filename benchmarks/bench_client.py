@@ -0,0 +1,80 @@
+import contextlib
+import io
+from email.message import Message
+
+from api import TimeServerAPI
+from time_server import _print_table
+from timecalc import UserTimes
+
+from . import data
+
+
+class _CannedResponse:
+    status = 200
+
+    def __init__(self, body: bytes, ctype: str):
+        self._body = body
+        self.headers = Message()
+        self.headers["Content-Type"] = ctype
+
+    def read(self, amt=None):
+        return self._body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _CannedTransport:
+    """Serves one fixed body, so only send_request's own work is timed."""
+
+    def __init__(self, body: bytes, ctype: str):
+        self.body = body
+        self.ctype = ctype
+
+    def urlopen(self, method, url, body=None, headers=None):
+        return _CannedResponse(self.body, self.ctype)
+
+    def close(self):
+        pass
+
+
+def _api(body: bytes = b"", ctype: str = "application/json") -> TimeServerAPI:
+    api = TimeServerAPI("http://127.0.0.1:5000/api/")
+    api.transport = _CannedTransport(body, ctype)
+    return api
+
+
+def cases():
+    """Yield (name, callable) pairs."""
+    api = _api()
+    for n in data.USER_SCALES:
+        payload = {"user_ids": list(range(n)), "time_offset": "600", "note": "odměna"}
+        yield f"encode_query/{n}", lambda p=payload: api._encode_query(p)
+        yield f"encode_form/{n}", lambda p=payload: api._encode_form(p)
+
+    for n in data.USER_SCALES:
+        users_api = _api(data.json_body(data.users(n)), "application/json; charset=utf-8")
+        yield f"send_request_json/users/{n}", lambda a=users_api: a.send_request("admin/list_users")
+        # Non-JSON content type takes the second json.loads attempt
+        logs_api = _api(data.json_body(data.logs(n)), "text/html; charset=utf-8")
+        yield f"send_request_text/logs/{n}", lambda a=logs_api: a.send_request("misc/get_logs")
+
+    for n in data.USER_SCALES:
+        seconds = [u[4] for u in data.users(n)]
+        yield f"format_time/{n}", lambda s=seconds: [TimeServerAPI.format_time(x) for x in s]
+
+    for n in data.USER_SCALES:
+        times = data.show_times(n)
+        yield f"user_time_rows/{n}", lambda t=times: UserTimes(t).rows()
+
+    headers = ["ID", "Tag", "Jméno", "Acr", "Offset(s)", "Start", "Aktivní"]
+    for n in data.USER_SCALES:
+        rows = data.users(n)
+
+        def print_table(rows=rows):
+            with contextlib.redirect_stdout(io.StringIO()):
+                _print_table(headers, rows)
+        yield f"print_table/users/{n}", print_table
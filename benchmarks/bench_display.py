@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import dot_surface
+import flipdot
+from flipdot import Canvas
+
+from . import data
+
+
+# Editor cell size with stand-in dot cells (real ones need cairo to render)
+_SCALE = 10
+_CELLS = (b"\x33\x33\x33\xff" * _SCALE * _SCALE, b"\xff" * 4 * _SCALE * _SCALE)
+
+
+def _canvas(screens: int) -> Canvas:
+    canvas = Canvas(screens)
+    for y, row in enumerate(data.drawing(screens)):
+        for x, v in enumerate(row):
+            canvas.set(x, y, v)
+    return canvas
+
+
+def _editor():
+    """display_tool.DisplayEditor, or None when GTK is not installed."""
+    try:
+        import display_tool
+    except (ImportError, ValueError):
+        return None
+    return display_tool.DisplayEditor
+
+
+def _editor_state(screens: int, canvas: Canvas, frame: str):
+    # Just the attributes get_buffer/load_frame touch, no widgets created
+    return SimpleNamespace(
+        screens=screens, bitmap=canvas, addr=0x08, redraw=lambda: None,
+        output_entry=SimpleNamespace(get_text=lambda: frame),
+        addr_combo=SimpleNamespace(set_active_id=lambda _: None),
+    )
+
+
+def cases():
+    # The editors' own get_buffer/load_frame need GTK to import; without it
+    # those cases are skipped
+    editor = _editor()
+    for screens in data.SCREEN_SCALES:
+        canvas = _canvas(screens)
+        raw = canvas.to_bytes()
+        frame = flipdot.encode_frame(canvas, 0x08)
+        png = canvas.to_png()
+        if editor is not None:
+            yield f"get_buffer/{screens}", lambda e=_editor_state(screens, canvas, frame): editor.get_buffer(e)
+            yield f"load_frame/{screens}", lambda e=_editor_state(screens, canvas, frame): editor.load_frame(e)
+        yield f"frame_encode/{screens}", lambda c=canvas: flipdot.encode_frame(c, 0x08)
+        yield f"frame_decode/{screens}", lambda f=frame, s=screens: flipdot.decode_frame(f, s)
+        yield f"raw_base64/{screens}", lambda c=canvas: c.to_base64()
+        yield f"from_bytes/{screens}", lambda r=raw, s=screens: Canvas.from_bytes(r, s)
+        yield f"png_encode/{screens}", lambda c=canvas: c.to_png()
+        yield f"png_decode/{screens}", lambda p=png, s=screens: Canvas.from_png(p, s)
+        yield f"surface_pixels/{screens}", lambda c=canvas: dot_surface.dot_pixels(c, _CELLS, _SCALE)
+    # A 5-panel frame saved by the browser: RGBA with every filter type
+    rgba = data.rgba_png(data.drawing(5))
+    yield "png_decode_rgba/5", lambda p=rgba: Canvas.from_png(p, 5)
@@ -0,0 +1,68 @@
+import json
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+USER_SCALES = (10, 100, 1_000, 10_000)
+SCREEN_SCALES = (1, 4, 16)
+
+
+def users(n: int, seed: int = 1) -> list:
+    """admin/list_users rows: [id, tag, name, acro, offset, start, active]."""
+    rnd = random.Random(seed)
+    now = datetime(2025, 7, 10, 12, 0, 0)
+    return [[i, f"{rnd.getrandbits(32):08X}", f"Hráč {i}", f"H{i}", rnd.randint(0, 900_000),
+             (now - timedelta(seconds=rnd.randint(0, 800_000))).isoformat(), 1]
+            for i in range(1, n + 1)]
+
+
+def show_times(n: int, seed: int = 1) -> list:
+    return [{"name": u[2], "offset": u[4], "start": u[5]} for u in users(n, seed)]
+
+
+def logs(n: int, seed: int = 1) -> list:
+    rnd = random.Random(seed)
+    return [[i, "2025-07-10T12:00:00", rnd.randint(1, 60), rnd.choice((-600, 60, 300)), "terminal payment"]
+            for i in range(1, n + 1)]
+
+
+def json_body(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def drawing(screens: int, seed: int = 1) -> list:
+    rnd = random.Random(seed)
+    return [[rnd.getrandbits(1) for _ in range(screens * 28)] for _ in range(19)]
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    return a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+
+
+def rgba_png(drawing: list) -> bytes:
+    """drawing as the web editor's browser saves it: 8-bit RGBA, set dots
+    black, the five PNG filter types taking turns row by row."""
+    width, height, bpp = len(drawing[0]), len(drawing), 4
+    raw = bytearray()
+    prev = bytes(width * bpp)
+    for y, row in enumerate(drawing):
+        line = b"".join(b"\x00\x00\x00\xff" if v else b"\xff\xff\xff\xff" for v in row)
+        ftype = y % 5
+        out = bytearray()
+        for i, x in enumerate(line):
+            a = line[i - bpp] if i >= bpp else 0
+            c = prev[i - bpp] if i >= bpp else 0
+            pred = (0, a, prev[i], (a + prev[i]) >> 1, _paeth(a, prev[i], c))[ftype]
+            out.append((x - pred) & 0xFF)
+        raw += bytes([ftype]) + out
+        prev = line
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+
+    def chunk(kind, payload):
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(bytes(raw)))
+            + chunk(b"IEND", b""))
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import gi
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk, Pango, PangoCairo
+from gi.repository import Gtk, Gdk
 
-import cairo
-import base64
 import serial
 import serial.tools.list_ports
 
-DISP_W_UNIT = 28
-DISP_H = 19
+import flipdot
+from dot_surface import DotSurface
+from flipdot import Canvas, DISP_H, DISP_W_UNIT
+
 SCALE = 10
+DOT_SIZE = SCALE * 0.75
+DOT_ON = (1, 1, 1)
+DOT_OFF = (0.2, 0.2, 0.2)
 CMD = 0x01
 ADDRESSES = {0x08, 0x09}
 
@@ -24,7 +27,8 @@ class DisplayEditor(Gtk.Window):
         self.serial = None
         self.baudrate = 19200
 
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
+        self.bitmap = Canvas(self.screens)
+        self.dots = DotSurface(SCALE, DOT_SIZE, DOT_ON, DOT_OFF)
         self.mouse_down = False
         self.mouse_erase = False
         self.inverse_text = False
@@ -38,6 +42,7 @@ class DisplayEditor(Gtk.Window):
         # === Drawing area
         self.canvas = Gtk.DrawingArea()
         self.update_canvas_size()
+        self.rebuild_surface()
         self.canvas.connect("draw", self.on_draw)
         self.canvas.add_events(Gdk.EventMask.BUTTON_PRESS_MASK |
                                Gdk.EventMask.BUTTON_RELEASE_MASK |
@@ -137,31 +142,41 @@ class DisplayEditor(Gtk.Window):
     def update_canvas_size(self):
         self.canvas.set_size_request(self.screens * DISP_W_UNIT * SCALE, DISP_H * SCALE)
 
+    def rebuild_surface(self):
+        # Whole-frame changes repaint the backing surface once, dot edits
+        # only touch their own cell (see set_dot)
+        self.dots.rebuild(self.bitmap)
+
+    def redraw(self):
+        self.rebuild_surface()
+        self.canvas.queue_draw()
+
+    def set_dot(self, x, y, value):
+        if self.bitmap.get(x, y) == value:
+            return
+        self.bitmap.set(x, y, value)
+        self.dots.set_dot(x, y, value)
+        self.canvas.queue_draw_area(x * SCALE, y * SCALE, SCALE, SCALE)
+
     def on_draw(self, widget, cr):
-        for y in range(DISP_H):
-            for x in range(self.screens * DISP_W_UNIT):
-                val = self.drawing[y][x]
-                cr.set_source_rgb(1, 1, 1) if val else cr.set_source_rgb(0.2, 0.2, 0.2)
-                size = SCALE * 0.75
-                offset = (SCALE - size) / 2
-                cr.rectangle(x * SCALE + offset, y * SCALE + offset, size, size)
-                cr.fill()
+        # GTK already clips cr to the invalidated area
+        cr.set_source_surface(self.dots.surface, 0, 0)
+        cr.paint()
 
     def clear(self, *_):
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
-        self.canvas.queue_draw()
+        self.bitmap.clear()
+        self.redraw()
 
     def fill(self, *_):
-        self.drawing = [[1 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
-        self.canvas.queue_draw()
+        self.bitmap.fill()
+        self.redraw()
 
     def on_mouse_down(self, widget, event):
         x, y = int(event.x // SCALE), int(event.y // SCALE)
         if 0 <= x < self.screens * DISP_W_UNIT and 0 <= y < DISP_H:
             self.mouse_down = True
             self.mouse_erase = (event.button == 3)
-            self.drawing[y][x] = 0 if self.mouse_erase else 1
-            self.canvas.queue_draw()
+            self.set_dot(x, y, 0 if self.mouse_erase else 1)
 
     def on_mouse_up(self, widget, event):
         self.mouse_down = False
@@ -170,8 +185,7 @@ class DisplayEditor(Gtk.Window):
         if self.mouse_down:
             x, y = int(event.x // SCALE), int(event.y // SCALE)
             if 0 <= x < self.screens * DISP_W_UNIT and 0 <= y < DISP_H:
-                self.drawing[y][x] = 0 if self.mouse_erase else 1
-                self.canvas.queue_draw()
+                self.set_dot(x, y, 0 if self.mouse_erase else 1)
 
     def draw_text(self, *_):
         text = self.entry_text.get_text()
@@ -187,52 +201,13 @@ class DisplayEditor(Gtk.Window):
         if self.italic_check.get_active():
             font_desc += " Italic"
 
-        surface = cairo.ImageSurface(cairo.FORMAT_A8, self.screens * DISP_W_UNIT, DISP_H)
-        ctx = cairo.Context(surface)
+        flipdot.draw_text(self.bitmap, text, x0, y0, font_desc, self.inverse_check.get_active())
 
-        layout = PangoCairo.create_layout(ctx)
-        pfd = Pango.FontDescription(font_desc)
-        layout.set_font_description(pfd)
-        layout.set_text(text, -1)
-
-        ctx.move_to(x0, y0)
-        ctx.set_source_rgb(1, 1, 1)
-        PangoCairo.show_layout(ctx, layout)
-
-        data = surface.get_data()
-        stride = surface.get_stride()
-        for y in range(DISP_H):
-            for x in range(self.screens * DISP_W_UNIT):
-                pixel = data[y * stride + x]
-                if pixel > 100:
-                    self.drawing[y][x] = 0 if self.inverse_check.get_active() else 1
-
-        self.canvas.queue_draw()
+        self.redraw()
 
     def get_buffer(self):
-        buf = bytearray()
         # Each display row padded to 32 bits = 4 bytes
-        bytes_per_display_row = 4
-        total_bytes_per_row = bytes_per_display_row * self.screens
-        width = self.screens * DISP_W_UNIT
-
-        for y in range(DISP_H):
-            for screen in range(self.screens):
-                x_offset = screen * DISP_W_UNIT
-                byte = 0
-                bit_index = 0
-                for x in range(DISP_W_UNIT):
-                    if self.drawing[y][x_offset + x]:
-                        byte |= 1 << bit_index
-                    bit_index += 1
-                    if bit_index == 8:
-                        buf.append(byte)
-                        byte = 0
-                        bit_index = 0
-                # pad remaining bits in byte (unused, but must add full byte count)
-                if bit_index > 0:
-                    buf.append(byte)
-        return buf
+        return bytearray(self.bitmap.to_bytes())
 
 
     def load_frame(self, *_):
@@ -240,50 +215,25 @@ class DisplayEditor(Gtk.Window):
         if not line.startswith("!FRAME;"):
             return
         try:
-            parts = line[7:].split(";")
-            addr = int(parts[0].split("=")[1], 16)
-            cmd = int(parts[1], 16)
-            length = int(parts[2], 16)
-            b64 = parts[3]
-            raw = base64.b64decode(b64)
-        except Exception as e:
+            addr, cmd, bitmap = flipdot.decode_frame(line, self.screens)
+        except ValueError as e:
             print("Parse error:", e)
             return
 
         self.addr = addr
         self.addr_combo.set_active_id(f"{addr:02X}")
-
-        width = self.screens * DISP_W_UNIT
-        self.drawing = [[0 for _ in range(width)] for _ in range(DISP_H)]
-
-        i = 0
-        bytes_per_display_row = 4
-        for y in range(DISP_H):
-            for screen in range(self.screens):
-                for b in range(bytes_per_display_row):
-                    if i >= len(raw):
-                        break
-                    byte = raw[i]
-                    for bit in range(8):
-                        x = screen * DISP_W_UNIT + b * 8 + bit
-                        if x < width:
-                            self.drawing[y][x] = (byte >> bit) & 1
-                    i += 1
-        self.canvas.queue_draw()
+        self.bitmap = bitmap
+        self.redraw()
 
 
     def export_frame(self, *_):
-        buf = self.get_buffer()
-        b64 = base64.b64encode(buf).decode()
-        header = f"!FRAME;ADDR={self.addr:02X};{CMD:02X};{len(buf):X};"
-        frame = header + b64
-        self.output_entry.set_text(frame)
+        self.output_entry.set_text(flipdot.encode_frame(self.bitmap, self.addr, CMD))
 
     def change_screens(self, spin):
         self.screens = int(spin.get_value())
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
+        self.bitmap = Canvas(self.screens)
         self.update_canvas_size()
-        self.canvas.queue_draw()
+        self.redraw()
 
     def change_address(self, combo):
         try:
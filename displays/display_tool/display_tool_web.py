@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 import gi
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk, Pango, PangoCairo
+from gi.repository import Gtk, Gdk
 
-import cairo
-import base64
-import io
+import flipdot
+from dot_surface import DotSurface
+from flipdot import Canvas, DISP_H, DISP_W_UNIT
 
-DISP_W_UNIT = 28
-DISP_H = 19
 SCALE = 10
+DOT_SIZE = SCALE * 0.75
+DOT_ON = (1, 1, 1)
+DOT_OFF = (0.2, 0.2, 0.2)
 
 class DisplayEditor(Gtk.Window):
     def __init__(self):
@@ -17,7 +18,8 @@ class DisplayEditor(Gtk.Window):
         self.set_resizable(False)
 
         self.screens = 5
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
+        self.bitmap = Canvas(self.screens)
+        self.dots = DotSurface(SCALE, DOT_SIZE, DOT_ON, DOT_OFF)
         self.mouse_down = False
         self.mouse_erase = False
 
@@ -30,6 +32,7 @@ class DisplayEditor(Gtk.Window):
         # === Drawing area
         self.canvas = Gtk.DrawingArea()
         self.update_canvas_size()
+        self.rebuild_surface()
         self.canvas.connect("draw", self.on_draw)
         self.canvas.add_events(Gdk.EventMask.BUTTON_PRESS_MASK |
                                Gdk.EventMask.BUTTON_RELEASE_MASK |
@@ -99,31 +102,41 @@ class DisplayEditor(Gtk.Window):
     def update_canvas_size(self):
         self.canvas.set_size_request(self.screens * DISP_W_UNIT * SCALE, DISP_H * SCALE)
 
+    def rebuild_surface(self):
+        # Whole-frame changes repaint the backing surface once, dot edits
+        # only touch their own cell (see set_dot)
+        self.dots.rebuild(self.bitmap)
+
+    def redraw(self):
+        self.rebuild_surface()
+        self.canvas.queue_draw()
+
+    def set_dot(self, x, y, value):
+        if self.bitmap.get(x, y) == value:
+            return
+        self.bitmap.set(x, y, value)
+        self.dots.set_dot(x, y, value)
+        self.canvas.queue_draw_area(x * SCALE, y * SCALE, SCALE, SCALE)
+
     def on_draw(self, widget, cr):
-        for y in range(DISP_H):
-            for x in range(self.screens * DISP_W_UNIT):
-                val = self.drawing[y][x]
-                cr.set_source_rgb(1, 1, 1) if val else cr.set_source_rgb(0.2, 0.2, 0.2)
-                size = SCALE * 0.75
-                offset = (SCALE - size) / 2
-                cr.rectangle(x * SCALE + offset, y * SCALE + offset, size, size)
-                cr.fill()
+        # GTK already clips cr to the invalidated area
+        cr.set_source_surface(self.dots.surface, 0, 0)
+        cr.paint()
 
     def clear(self, *_):
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
-        self.canvas.queue_draw()
+        self.bitmap.clear()
+        self.redraw()
 
     def fill(self, *_):
-        self.drawing = [[1 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
-        self.canvas.queue_draw()
+        self.bitmap.fill()
+        self.redraw()
 
     def on_mouse_down(self, widget, event):
         x, y = int(event.x // SCALE), int(event.y // SCALE)
         if 0 <= x < self.screens * DISP_W_UNIT and 0 <= y < DISP_H:
             self.mouse_down = True
             self.mouse_erase = (event.button == 3)
-            self.drawing[y][x] = 0 if self.mouse_erase else 1
-            self.canvas.queue_draw()
+            self.set_dot(x, y, 0 if self.mouse_erase else 1)
 
     def on_mouse_up(self, widget, event):
         self.mouse_down = False
@@ -132,8 +145,7 @@ class DisplayEditor(Gtk.Window):
         if self.mouse_down:
             x, y = int(event.x // SCALE), int(event.y // SCALE)
             if 0 <= x < self.screens * DISP_W_UNIT and 0 <= y < DISP_H:
-                self.drawing[y][x] = 0 if self.mouse_erase else 1
-                self.canvas.queue_draw()
+                self.set_dot(x, y, 0 if self.mouse_erase else 1)
 
     def draw_text(self, *_):
         text = self.entry_text.get_text()
@@ -149,45 +161,13 @@ class DisplayEditor(Gtk.Window):
         if self.italic_check.get_active():
             font_desc += " Italic"
 
-        surface = cairo.ImageSurface(cairo.FORMAT_A8, self.screens * DISP_W_UNIT, DISP_H)
-        ctx = cairo.Context(surface)
+        flipdot.draw_text(self.bitmap, text, x0, y0, font_desc, self.inverse_check.get_active())
 
-        layout = PangoCairo.create_layout(ctx)
-        pfd = Pango.FontDescription(font_desc)
-        layout.set_font_description(pfd)
-        layout.set_text(text, -1)
-
-        ctx.move_to(x0, y0)
-        ctx.set_source_rgb(1, 1, 1)
-        PangoCairo.show_layout(ctx, layout)
-
-        data = surface.get_data()
-        stride = surface.get_stride()
-        for y in range(DISP_H):
-            for x in range(self.screens * DISP_W_UNIT):
-                pixel = data[y * stride + x]
-                if pixel > 100:
-                    self.drawing[y][x] = 0 if self.inverse_check.get_active() else 1
-
-        self.canvas.queue_draw()
+        self.redraw()
 
     def export_base64(self, *_):
         # Render to PNG Base64 (same format as web)
-        width = self.screens * DISP_W_UNIT
-        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, DISP_H)
-        ctx = cairo.Context(surface)
-
-        # Draw pixels
-        for y in range(DISP_H):
-            for x in range(width):
-                ctx.set_source_rgb(0, 0, 0) if self.drawing[y][x] else ctx.set_source_rgb(1, 1, 1)
-                ctx.rectangle(x, y, 1, 1)
-                ctx.fill()
-
-        buffer = io.BytesIO()
-        surface.write_to_png(buffer)
-        b64 = base64.b64encode(buffer.getvalue()).decode()
-        self.output_entry.set_text(b64)
+        self.output_entry.set_text(self.bitmap.to_png_base64())
 
     def load_base64(self, *_):
         # Load Base64 PNG into buffer
@@ -196,34 +176,19 @@ class DisplayEditor(Gtk.Window):
             return
 
         try:
-            png_data = base64.b64decode(b64_data)
-            surface = cairo.ImageSurface.create_from_png(io.BytesIO(png_data))
-            ctx = cairo.Context(surface)
-
-            width = self.screens * DISP_W_UNIT
-            img_data = surface.get_data()
-            stride = surface.get_stride()
-
-            for y in range(DISP_H):
-                for x in range(width):
-                    # RGB24 format: 4 bytes per pixel (B,G,R,unused) but Cairo uses native endianness
-                    pixel_offset = y * stride + x * 4
-                    r = img_data[pixel_offset + 2]
-                    g = img_data[pixel_offset + 1]
-                    b = img_data[pixel_offset + 0]
-                    # consider black if RGB average < 128
-                    self.drawing[y][x] = 1 if (r + g + b) / 3 < 128 else 0
-
-            self.canvas.queue_draw()
-
+            loaded = Canvas.from_png_base64(b64_data)
         except Exception as e:
             print("Failed to load Base64 PNG:", e)
+            return
+        self.bitmap = Canvas(self.screens)
+        self.bitmap.paste(loaded)
+        self.redraw()
 
     def change_screens(self, spin):
         self.screens = int(spin.get_value())
-        self.drawing = [[0 for _ in range(self.screens * DISP_W_UNIT)] for _ in range(DISP_H)]
+        self.bitmap = Canvas(self.screens)
         self.update_canvas_size()
-        self.canvas.queue_draw()
+        self.redraw()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+# Headless Flippity210 frame rendering: bitmap canvas, text, and the
+# !FRAME / raw base64 / ESP8266 display_output / PNG formats. No GTK needed; Pango/Cairo are only
+# imported to rasterise glyphs missing from the atlas, so a server process
+# with a saved atlas (see main) renders text without them.
+
+import base64
+import json
+import os
+import struct
+import tempfile
+import zlib
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # bytearray fallback below
+    np = None
+
+DISP_W_UNIT = 28
+DISP_H = 19
+CMD = 0x01
+BYTES_PER_PANEL_ROW = 4  # 28 columns padded to 32 bits, LSB first
+
+
+_BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
+_CHAR_BITS = bytes.maketrans(b"01", b"\x00\x01")
+_INVERT = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+_DARK_CHARS = bytes.maketrans(b"\x00\x01", b"10")  # set dot -> black (0) in 1-bit gray
+_DARK = bytes(1 if v < 128 else 0 for v in range(256))
+
+
+class Canvas:
+    """Black/white dot matrix of `screens` panels, DISP_H rows high.
+
+    `pixels` holds one 0/1 byte per dot, row major: a flat NumPy uint8
+    array when NumPy is installed, a bytearray otherwise. Whole-canvas
+    operations work on the buffer at once instead of dot by dot.
+    """
+
+    def __init__(self, screens: int = 1, height: int = DISP_H, width: int | None = None):
+        self.screens = screens
+        self.width = width if width is not None else screens * DISP_W_UNIT
+        self.height = height
+        self.clear()
+
+    def get(self, x: int, y: int) -> int:
+        return int(self.pixels[y * self.width + x])
+
+    def set(self, x: int, y: int, value: int = 1) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y * self.width + x] = 1 if value else 0
+
+    def view(self):
+        """2-D (height, width) view of the pixels, NumPy only."""
+        return self.pixels.reshape(self.height, self.width)
+
+    def clear(self) -> None:
+        n = self.width * self.height
+        self.pixels = np.zeros(n, dtype=np.uint8) if np is not None else bytearray(n)
+
+    def fill(self) -> None:
+        n = self.width * self.height
+        self.pixels = np.ones(n, dtype=np.uint8) if np is not None else bytearray(b"\x01" * n)
+
+    def invert(self) -> None:
+        if np is not None:
+            self.pixels ^= 1
+        else:
+            self.pixels = self.pixels.translate(_INVERT)
+
+    def fill_rect(self, x: int, y: int, w: int, h: int, value: int = 1) -> None:
+        x0, x1 = max(x, 0), min(x + w, self.width)
+        y0, y1 = max(y, 0), min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        v = 1 if value else 0
+        if np is not None:
+            self.view()[y0:y1, x0:x1] = v
+            return
+        run = bytes([v]) * (x1 - x0)
+        for yy in range(y0, y1):
+            self.pixels[yy * self.width + x0:yy * self.width + x1] = run
+
+    def rows(self) -> list:
+        """Copy as a list of row lists (the editors' old `drawing`)."""
+        if np is not None:
+            return self.view().tolist()
+        w = self.width
+        return [list(self.pixels[y * w:(y + 1) * w]) for y in range(self.height)]
+
+    def _overlap(self, other: "Canvas", x: int, y: int):
+        # Clipped (dst_x, dst_y, src_x, src_y, w, h) of `other` placed at (x, y)
+        sx, sy = max(-x, 0), max(-y, 0)
+        w = min(other.width - sx, self.width - x - sx)
+        h = min(other.height - sy, self.height - y - sy)
+        return x + sx, y + sy, sx, sy, w, h
+
+    def paste(self, other: "Canvas", x: int = 0, y: int = 0) -> None:
+        """Copy the overlapping part of another canvas to (x, y)."""
+        dx, dy, sx, sy, w, h = self._overlap(other, x, y)
+        if w <= 0 or h <= 0:
+            return
+        if np is not None:
+            self.view()[dy:dy + h, dx:dx + w] = other.view()[sy:sy + h, sx:sx + w]
+            return
+        for r in range(h):
+            src = (sy + r) * other.width + sx
+            dst = (dy + r) * self.width + dx
+            self.pixels[dst:dst + w] = other.pixels[src:src + w]
+
+    def stamp(self, mask, x: int = 0, y: int = 0, value: int = 1) -> None:
+        """Set dots where `mask` (a Canvas) is lit; unlit mask dots are left alone."""
+        dx, dy, sx, sy, w, h = self._overlap(mask, x, y)
+        if w <= 0 or h <= 0:
+            return
+        if np is not None:
+            dst = self.view()[dy:dy + h, dx:dx + w]
+            src = mask.view()[sy:sy + h, sx:sx + w]
+            if value:
+                dst |= src
+            else:
+                dst &= src ^ 1
+            return
+        for r in range(h):
+            s0 = (sy + r) * mask.width + sx
+            d0 = (dy + r) * self.width + dx
+            # 0/1 bytes read as big integers OR/AND-NOT byte for byte
+            src = int.from_bytes(mask.pixels[s0:s0 + w], "big")
+            dst = int.from_bytes(self.pixels[d0:d0 + w], "big")
+            dst = dst | src if value else dst & ~src
+            self.pixels[d0:d0 + w] = dst.to_bytes(w, "big")
+
+    # --- raw panel format ---
+
+    def to_bytes(self) -> bytes:
+        """Frame payload: for each row, 4 bytes per panel, bit x of a panel row LSB first."""
+        panels_w = self.screens * DISP_W_UNIT
+        if np is not None:
+            dots = np.zeros((self.height, panels_w), dtype=np.uint8)
+            w = min(self.width, panels_w)
+            dots[:, :w] = self.view()[:, :w]
+            grid = np.zeros((self.height, self.screens, BYTES_PER_PANEL_ROW * 8), dtype=np.uint8)
+            grid[:, :, :DISP_W_UNIT] = dots.reshape(self.height, self.screens, DISP_W_UNIT)
+            return np.packbits(grid, axis=-1, bitorder="little").tobytes()
+        buf = bytearray()
+        w = min(self.width, panels_w)
+        pad = b"\x00" * (panels_w - w)
+        for y in range(self.height):
+            row = bytes(self.pixels[y * self.width:y * self.width + w]) + pad
+            for screen in range(self.screens):
+                # LSB first: reversed dot string is the binary number
+                dots = row[screen * DISP_W_UNIT:(screen + 1) * DISP_W_UNIT]
+                bits = int(dots[::-1].translate(_BIT_CHARS), 2)
+                buf += bits.to_bytes(BYTES_PER_PANEL_ROW, "little")
+        return bytes(buf)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, screens: int, height: int = DISP_H) -> "Canvas":
+        """Inverse of to_bytes; a short payload leaves the remaining dots unset."""
+        canvas = cls(screens, height)
+        per_row = screens * BYTES_PER_PANEL_ROW
+        raw = bytes(raw[:per_row * height])
+        if np is not None:
+            packed = np.zeros(per_row * height, dtype=np.uint8)
+            packed[:len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+            bits = np.unpackbits(packed.reshape(height, screens, BYTES_PER_PANEL_ROW), axis=-1, bitorder="little")
+            canvas.pixels = np.ascontiguousarray(bits[:, :, :DISP_W_UNIT]).reshape(-1)
+            return canvas
+        width = canvas.width
+        for i in range(0, len(raw), BYTES_PER_PANEL_ROW):
+            y, screen = divmod(i // BYTES_PER_PANEL_ROW, screens)
+            bits = int.from_bytes(raw[i:i + BYTES_PER_PANEL_ROW], "little")
+            dots = format(bits, "032b")[::-1][:DISP_W_UNIT].encode().translate(_CHAR_BITS)
+            x0 = y * width + screen * DISP_W_UNIT
+            canvas.pixels[x0:x0 + DISP_W_UNIT] = dots
+        return canvas
+
+    def to_base64(self) -> str:
+        # The !FRAME payload, base64 encoded
+        return base64.b64encode(self.to_bytes()).decode()
+
+    @classmethod
+    def from_base64(cls, b64: str, screens: int) -> "Canvas":
+        return cls.from_bytes(base64.b64decode(b64), screens)
+
+    # --- full-width rows, as drawFrame in esp8266_buse_client.ino reads them ---
+
+    def to_firmware_bytes(self) -> bytes:
+        """display_output payload: each row packed across the whole width,
+        ceil(width / 8) bytes, bit x % 8 of a byte LSB first; no panel padding."""
+        if np is not None:
+            return np.packbits(self.view(), axis=1, bitorder="little").tobytes()
+        w = self.width
+        stride = (w + 7) // 8
+        buf = bytearray()
+        for y in range(self.height):
+            # LSB first: reversed dot string is the binary number
+            bits = int(bytes(self.pixels[y * w:(y + 1) * w])[::-1].translate(_BIT_CHARS) or b"0", 2)
+            buf += bits.to_bytes(stride, "little")
+        return bytes(buf)
+
+    @classmethod
+    def from_firmware_bytes(cls, raw: bytes, screens: int, height: int = DISP_H) -> "Canvas":
+        """Inverse of to_firmware_bytes; a short payload leaves the remaining dots unset."""
+        canvas = cls(screens, height)
+        w = canvas.width
+        stride = (w + 7) // 8
+        raw = bytes(raw[:stride * height])
+        if np is not None:
+            packed = np.zeros(stride * height, dtype=np.uint8)
+            packed[:len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+            bits = np.unpackbits(packed.reshape(height, stride), axis=1, bitorder="little")
+            canvas.pixels = np.ascontiguousarray(bits[:, :w]).reshape(-1)
+            return canvas
+        raw = raw.ljust(stride * height, b"\x00")
+        for y in range(height):
+            bits = int.from_bytes(raw[y * stride:(y + 1) * stride], "little")
+            dots = format(bits, f"0{stride * 8}b")[::-1][:w].encode().translate(_CHAR_BITS)
+            canvas.pixels[y * w:(y + 1) * w] = dots
+        return canvas
+
+    def to_firmware_base64(self) -> str:
+        # What display/display_output/<name>?format=base64 serves to the ESP8266
+        return base64.b64encode(self.to_firmware_bytes()).decode()
+
+    # --- PNG, as written by the web editor (black dot = set) ---
+
+    def to_png(self) -> bytes:
+        """1-bit grayscale PNG, lit dots black and the rest white.
+
+        Scanlines are packed straight from the pixel buffer; any PNG reader
+        (browser, Cairo, from_png) sees the same image as the old 8-bit RGB.
+        """
+        w, h = self.width, self.height
+        if np is not None:
+            scanlines = np.zeros((h, 1 + (w + 7) // 8), dtype=np.uint8)  # column 0: filter none
+            scanlines[:, 1:] = np.packbits(self.view() == 0, axis=1)
+            return _png_pack(w, h, 1, 0, scanlines.tobytes())
+        stride = (w + 7) // 8
+        pad = stride * 8 - w
+        raw = bytearray()
+        for y in range(h):
+            bits = int(bytes(self.pixels[y * w:(y + 1) * w]).translate(_DARK_CHARS), 2) << pad
+            raw.append(0)  # filter: none
+            raw += bits.to_bytes(stride, "big")
+        return _png_pack(w, h, 1, 0, bytes(raw))
+
+    def to_png_base64(self) -> str:
+        return base64.b64encode(self.to_png()).decode()
+
+    @classmethod
+    def from_png(cls, data: bytes, screens: int | None = None) -> "Canvas":
+        """Dots whose RGB average is below 128 are set (alpha is ignored)."""
+        width, height, gray = _png_gray(data)
+        if screens is None:
+            screens = -(-width // DISP_W_UNIT)
+        canvas = cls(screens, height, width)
+        if np is not None:
+            canvas.pixels = (gray < 128).astype(np.uint8)
+        else:
+            canvas.pixels = bytearray(gray.translate(_DARK))
+        return canvas
+
+    @classmethod
+    def from_png_base64(cls, b64: str, screens: int | None = None) -> "Canvas":
+        return cls.from_png(base64.b64decode(b64), screens)
+
+
+# --- !FRAME serial format ---
+
+def encode_frame(canvas: Canvas, addr: int, cmd: int = CMD) -> str:
+    buf = canvas.to_bytes()
+    return f"!FRAME;ADDR={addr:02X};{cmd:02X};{len(buf):X};" + base64.b64encode(buf).decode()
+
+
+def decode_frame(line: str, screens: int):
+    """Parse a !FRAME line into (addr, cmd, Canvas); raises ValueError if malformed."""
+    if not line.startswith("!FRAME;"):
+        raise ValueError("missing !FRAME; prefix")
+    try:
+        parts = line[7:].split(";")
+        addr = int(parts[0].split("=")[1], 16)
+        cmd = int(parts[1], 16)
+        int(parts[2], 16)  # payload length, implied by the base64 part
+        raw = base64.b64decode(parts[3])
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"bad frame: {e}") from e
+    return addr, cmd, Canvas.from_bytes(raw, screens)
+
+
+# --- text ---
+
+def _pango():
+    """(Pango, PangoCairo, cairo) modules, or None on a headless box."""
+    try:
+        import gi
+        gi.require_version("Pango", "1.0")
+        gi.require_version("PangoCairo", "1.0")
+        from gi.repository import Pango, PangoCairo
+        import cairo
+    except (ImportError, ValueError):
+        return None
+    return Pango, PangoCairo, cairo
+
+
+def _pixels(raw: bytes):
+    # Canvas.pixels buffer of the active backend from 0/1 bytes
+    return np.frombuffer(raw, dtype=np.uint8).copy() if np is not None else bytearray(raw)
+
+
+class Glyph:
+    """Thresholded bitmap of one character.
+
+    `mask` is drawn at (pen + dx, y + dy), where (x, y) is the top-left of
+    the Pango layout; `advance` is the logical width in (fractional) dots.
+    """
+
+    __slots__ = ("mask", "dx", "dy", "advance")
+
+    def __init__(self, mask: Canvas, dx: int, dy: int, advance: float):
+        self.mask = mask
+        self.dx = dx
+        self.dy = dy
+        self.advance = advance
+
+
+class GlyphAtlas:
+    """Cache of rasterised glyphs and kerning pairs per font description.
+
+    Glyphs missing from the cache are rendered with Pango (one layout per
+    character, never again for the same font) and kept in an LRU of
+    `maxsize` entries. Glyphs loaded from a saved atlas are kept for good,
+    so a process without Pango can render any text they cover.
+    """
+
+    def __init__(self, maxsize: int = 512, path: str | None = None):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()  # (font, char) -> Glyph
+        self._static = {}          # glyphs loaded from disk
+        self._kerning = {}         # (font, left, right) -> dots
+        self._modules = None
+        if path is not None:
+            self.load(path)
+
+    def _pango_modules(self):
+        if self._modules is None:
+            self._modules = _pango() or False
+        return self._modules
+
+    def glyph(self, font_desc: str, char: str) -> Glyph:
+        key = (font_desc, char)
+        g = self._static.get(key)
+        if g is not None:
+            return g
+        g = self._lru.get(key)
+        if g is not None:
+            self._lru.move_to_end(key)
+            return g
+        g = self._rasterise(font_desc, char)
+        self._lru[key] = g
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+        return g
+
+    def kerning(self, font_desc: str, left: str, right: str) -> float:
+        """Pair adjustment in dots: advance of left+right minus their own advances."""
+        key = (font_desc, left, right)
+        k = self._kerning.get(key)
+        if k is None:
+            mods = self._pango_modules()
+            if not mods:
+                return 0.0  # not in the atlas, render unkerned
+            pair = self._layout_width(font_desc, left + right)
+            k = pair - self.glyph(font_desc, left).advance - self.glyph(font_desc, right).advance
+            self._kerning[key] = k
+        return k
+
+    def _layout(self, font_desc: str, text: str, ctx=None):
+        Pango, PangoCairo, cairo = self._pango_modules()
+        if ctx is None:
+            ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_A8, 1, 1))
+        layout = PangoCairo.create_layout(ctx)
+        layout.set_font_description(Pango.FontDescription(font_desc))
+        layout.set_text(text, -1)
+        return layout
+
+    def _layout_width(self, font_desc: str, text: str) -> float:
+        Pango = self._pango_modules()[0]
+        return self._layout(font_desc, text).get_extents()[1].width / Pango.SCALE
+
+    def _rasterise(self, font_desc: str, char: str) -> Glyph:
+        mods = self._pango_modules()
+        if not mods:
+            raise KeyError(f"glyph {char!r} of {font_desc!r} is not in the atlas and Pango is unavailable")
+        Pango, PangoCairo, cairo = mods
+        ink, logical = self._layout(font_desc, char).get_pixel_extents()
+        x0, y0 = min(ink.x, logical.x, 0), min(ink.y, logical.y, 0)
+        x1 = max(ink.x + ink.width, logical.x + logical.width, x0 + 1)
+        y1 = max(ink.y + ink.height, logical.y + logical.height, y0 + 1)
+        w, h = x1 - x0, y1 - y0
+
+        surface = cairo.ImageSurface(cairo.FORMAT_A8, w, h)
+        ctx = cairo.Context(surface)
+        layout = self._layout(font_desc, char, ctx)
+        ctx.move_to(-x0, -y0)
+        ctx.set_source_rgb(1, 1, 1)
+        PangoCairo.show_layout(ctx, layout)
+        surface.flush()
+
+        mask = Canvas(1, h, w)
+        mask.pixels = _threshold(surface.get_data(), surface.get_stride(), w, h)
+        return Glyph(mask, x0, y0, layout.get_extents()[1].width / Pango.SCALE)
+
+    def prebuild(self, font_desc: str, chars: str) -> None:
+        """Rasterise chars and all their pairs' kerning, e.g. for a D:HH:MM:SS countdown."""
+        for c in chars:
+            self._static[(font_desc, c)] = self.glyph(font_desc, c)
+        for a in chars:
+            for b in chars:
+                self.kerning(font_desc, a, b)
+
+    def save(self, path: str) -> None:
+        glyphs = []
+        for (font, char), g in {**self._lru, **self._static}.items():
+            glyphs.append({"font": font, "char": char, "w": g.mask.width, "h": g.mask.height,
+                           "dx": g.dx, "dy": g.dy, "advance": g.advance,
+                           "bits": base64.b64encode(zlib.compress(bytes(g.mask.pixels))).decode()})
+        data = {"version": 1, "glyphs": glyphs,
+                "kerning": [[f, a, b, k] for (f, a, b), k in self._kerning.items()]}
+        d = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".atlas_", dir=d)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for e in data.get("glyphs", []):
+            mask = Canvas(1, e["h"], e["w"])
+            mask.pixels = _pixels(zlib.decompress(base64.b64decode(e["bits"])))
+            self._static[(e["font"], e["char"])] = Glyph(mask, e["dx"], e["dy"], e["advance"])
+        for f, a, b, k in data.get("kerning", []):
+            self._kerning[(f, a, b)] = k
+
+
+_atlas = None
+
+
+def default_atlas() -> GlyphAtlas:
+    """Process-wide atlas, preloaded from $FLIPDOT_ATLAS when set."""
+    global _atlas
+    if _atlas is None:
+        path = os.environ.get("FLIPDOT_ATLAS")
+        _atlas = GlyphAtlas(path=path if path and os.path.exists(path) else None)
+    return _atlas
+
+
+def draw_text(canvas: Canvas, text: str, x: int, y: int, font_desc: str = "Sans 10",
+              inverse: bool = False, atlas: GlyphAtlas | None = None) -> None:
+    """Draw text with (x, y) as the top-left of its layout, like PangoCairo.show_layout.
+
+    Each character is a cached glyph blitted at the pen position, which
+    advances by the glyph width plus the pair kerning. `inverse` clears
+    the covered dots instead of setting them.
+    """
+    atlas = atlas if atlas is not None else default_atlas()
+    value = 0 if inverse else 1
+    pen = 0.0
+    prev = None
+    for char in text:
+        if prev is not None:
+            pen += atlas.kerning(font_desc, prev, char)
+        g = atlas.glyph(font_desc, char)
+        canvas.stamp(g.mask, x + round(pen) + g.dx, y + g.dy, value)
+        pen += g.advance
+        prev = char
+
+
+def _threshold(data, stride: int, width: int, height: int, level: int = 100):
+    """A8 coverage buffer -> Canvas pixels, 1 where coverage > level."""
+    if np is not None:
+        cov = np.frombuffer(data, dtype=np.uint8).reshape(height, stride)[:, :width]
+        return (cov > level).astype(np.uint8).reshape(-1)
+    table = bytes(1 if v > level else 0 for v in range(256))
+    data = bytes(data)
+    out = bytearray()
+    for y in range(height):
+        out += data[y * stride:y * stride + width].translate(table)
+    return out
+
+
+# --- minimal PNG codec (non-interlaced, 8-bit or 1-bit samples) ---
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunk(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def _png_pack(width: int, height: int, depth: int, color: int, scanlines: bytes) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, depth, color, 0, 0, 0)
+    return _PNG_SIG + _chunk(b"IHDR", ihdr) + _chunk(b"IDAT", zlib.compress(scanlines, 6)) + _chunk(b"IEND", b"")
+
+
+def _unavg(line: list, prev, bpp: int) -> None:
+    for i in range(bpp):
+        line[i] = (line[i] + (prev[i] >> 1)) & 0xFF
+    for i in range(bpp, len(line)):
+        line[i] = (line[i] + ((line[i - bpp] + prev[i]) >> 1)) & 0xFF
+
+
+def _unpaeth(line: list, prev, bpp: int) -> None:
+    # Left and upper-left are 0 for the first pixel, so the predictor is up
+    for i in range(bpp):
+        line[i] = (line[i] + prev[i]) & 0xFF
+    for i in range(bpp, len(line)):
+        a, b, c = line[i - bpp], prev[i], prev[i - bpp]
+        pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - c - c)
+        line[i] = (line[i] + (a if pa <= pb and pa <= pc else (b if pb <= pc else c))) & 0xFF
+
+
+def _unfilter(data: bytes, height: int, stride: int, bpp: int) -> bytes:
+    """Undo the per-scanline PNG filters; returns height * stride bytes.
+
+    With NumPy, Sub is a wrapping cumulative sum per byte lane and Up one
+    row addition. Average and Paeth depend on the byte just decoded, so
+    they stay a loop over the row either way.
+    """
+    if len(data) < height * (stride + 1):
+        raise ValueError("truncated PNG image data")
+    if np is not None:
+        rows = np.frombuffer(data, dtype=np.uint8, count=height * (stride + 1)).reshape(height, stride + 1)
+        out = rows[:, 1:].copy()
+        prev = np.zeros(stride, dtype=np.uint8)
+        for y, ftype in enumerate(rows[:, 0].tolist()):
+            line = out[y]
+            if ftype == 1:
+                lanes = line.reshape(-1, bpp)  # stride is a whole number of pixels
+                np.cumsum(lanes, axis=0, dtype=np.uint8, out=lanes)
+            elif ftype == 2:
+                line += prev
+            elif ftype in (3, 4):
+                decoded = line.tolist()
+                (_unavg if ftype == 3 else _unpaeth)(decoded, prev.tolist(), bpp)
+                line[:] = decoded
+            elif ftype != 0:
+                raise ValueError(f"bad PNG filter type {ftype}")
+            prev = line
+        return out.tobytes()
+
+    out = bytearray(height * stride)
+    prev = bytes(stride)
+    pos = 0
+    for y in range(height):
+        ftype = data[pos]
+        line = bytearray(data[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        if ftype == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 0xFF
+        elif ftype == 2:
+            line = bytearray(a + b & 0xFF for a, b in zip(line, prev))
+        elif ftype in (3, 4):
+            decoded = list(line)
+            (_unavg if ftype == 3 else _unpaeth)(decoded, prev, bpp)
+            line = bytearray(decoded)
+        elif ftype != 0:
+            raise ValueError(f"bad PNG filter type {ftype}")
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return bytes(out)
+
+
+def _png_gray(data: bytes):
+    """Decode a PNG to (width, height, gray), gray = RGB average per pixel.
+
+    gray is a flat uint8 array with NumPy, bytes otherwise.
+    """
+    if not data.startswith(_PNG_SIG):
+        raise ValueError("not a PNG")
+    pos = len(_PNG_SIG)
+    idat = bytearray()
+    palette = None
+    header = None
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        payload = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", payload)
+        elif kind == b"PLTE":
+            palette = payload
+        elif kind == b"IDAT":
+            idat += payload
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise ValueError("PNG without IHDR")
+    width, height, depth, color, _, _, interlace = header
+    if interlace or color not in _CHANNELS or depth not in (1, 8) or (depth == 1 and color not in (0, 3)):
+        raise ValueError(f"unsupported PNG (depth {depth}, color type {color}, interlace {interlace})")
+    if color == 3 and palette is None:
+        raise ValueError("PNG without PLTE")
+    channels = _CHANNELS[color]
+    stride = (width * channels * depth + 7) // 8
+    pixels = _unfilter(zlib.decompress(bytes(idat)), height, stride, max(1, channels * depth // 8))
+
+    # Palette indices and 1-bit samples go through a 256-entry gray table
+    if color == 3:
+        lut = bytes(sum(palette[3 * i:3 * i + 3]) // 3 for i in range(256))
+    elif depth == 1:
+        lut = b"\x00\xff" + bytes(254)
+    else:
+        lut = None
+
+    if np is not None:
+        rows = np.frombuffer(pixels, dtype=np.uint8).reshape(height, stride)
+        if depth == 1:
+            samples = np.unpackbits(rows, axis=1)[:, :width]
+        elif color in (2, 6):
+            rgb = rows[:, :width * channels].reshape(height, width, channels)[:, :, :3]
+            return width, height, (rgb.sum(axis=2, dtype=np.uint16) // 3).astype(np.uint8).reshape(-1)
+        else:
+            samples = rows[:, 0:width * channels:channels]
+        if lut is not None:
+            samples = np.frombuffer(lut, dtype=np.uint8)[samples]
+        return width, height, np.ascontiguousarray(samples).reshape(-1)
+
+    gray = bytearray()
+    for y in range(height):
+        line = pixels[y * stride:(y + 1) * stride]
+        if depth == 1:
+            samples = format(int.from_bytes(line, "big"), f"0{stride * 8}b")[:width].encode().translate(_CHAR_BITS)
+        elif color in (2, 6):
+            gray += bytes((r + g + b) // 3 for r, g, b in zip(line[0::channels], line[1::channels], line[2::channels]))
+            continue
+        else:
+            samples = line[0:width * channels:channels]
+        gray += samples.translate(lut) if lut is not None else samples
+    return width, height, bytes(gray)
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    p = argparse.ArgumentParser(description="Pre-build a glyph atlas for headless text rendering")
+    p.add_argument("out", help="Atlas JSON file to write (use via FLIPDOT_ATLAS or GlyphAtlas(path=...))")
+    p.add_argument("--font", action="append", required=True, help="Pango font description, repeatable")
+    p.add_argument("--chars", default="0123456789:D- ", help="Characters to rasterise")
+    args = p.parse_args(argv)
+
+    atlas = GlyphAtlas()
+    if not atlas._pango_modules():
+        print("Pango (PyGObject + pycairo) is needed to build an atlas")
+        return 1
+    for font in args.font:
+        atlas.prebuild(font, args.chars)
+    atlas.save(args.out)
+    print(f"{len(args.font) * len(set(args.chars))} glyphs saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
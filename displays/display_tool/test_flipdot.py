@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# PNG round trips through Canvas: python -m unittest test_flipdot
+# (from this directory; runs with and without NumPy)
+
+import random
+import struct
+import unittest
+import zlib
+
+from flipdot import Canvas
+
+
+def _random_canvas(screens: int, seed: int = 1) -> Canvas:
+    rnd = random.Random(seed)
+    canvas = Canvas(screens)
+    for y in range(canvas.height):
+        for x in range(canvas.width):
+            canvas.set(x, y, rnd.getrandbits(1))
+    return canvas
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    return a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+
+
+def _browser_png(canvas: Canvas, cycle: bool = False) -> bytes:
+    """canvas as the web editor's browser saves it: 8-bit RGBA, set dots
+    black, each row with the filter that gives the smallest sum of
+    absolute residuals (the heuristic libpng and browsers use), or with
+    cycle=True the five filter types taking turns."""
+    bpp = 4
+    raw = bytearray()
+    prev = bytes(canvas.width * bpp)
+    for y, row in enumerate(canvas.rows()):
+        line = b"".join(b"\x00\x00\x00\xff" if v else b"\xff\xff\xff\xff" for v in row)
+        best = None
+        for ftype in ([y % 5] if cycle else range(5)):
+            out = bytearray([ftype])
+            for i, x in enumerate(line):
+                a = line[i - bpp] if i >= bpp else 0
+                c = prev[i - bpp] if i >= bpp else 0
+                pred = (0, a, prev[i], (a + prev[i]) >> 1, _paeth(a, prev[i], c))[ftype]
+                out.append((x - pred) & 0xFF)
+            cost = sum(v if v < 128 else 256 - v for v in out[1:])
+            if best is None or cost < best[0]:
+                best = (cost, out)
+        raw += best[1]
+        prev = line
+    ihdr = struct.pack(">IIBBBBB", canvas.width, canvas.height, 8, 6, 0, 0, 0)
+
+    def chunk(kind, payload):
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(bytes(raw)))
+            + chunk(b"IEND", b""))
+
+
+def _png_rows(png: bytes, stride: int) -> list:
+    # Filtered scanlines of a single-IDAT PNG as written by _browser_png
+    (length,) = struct.unpack(">I", png[33:37])
+    raw = zlib.decompress(png[41:41 + length])
+    return [raw[i:i + 1 + stride] for i in range(0, len(raw), 1 + stride)]
+
+
+class PngRoundTripTest(unittest.TestCase):
+    def assertSameFrame(self, got: Canvas, want: Canvas):
+        self.assertEqual(got.to_bytes(), want.to_bytes())
+        self.assertEqual(got.to_firmware_bytes(), want.to_firmware_bytes())
+
+    def test_browser_rgba_png(self):
+        for screens in (1, 5):
+            canvas = _random_canvas(screens)
+            png = _browser_png(canvas)
+            filters = {row[0] for row in _png_rows(png, canvas.width * 4)}
+            self.assertGreater(len(filters), 1)  # the heuristic mixes filter types
+            self.assertSameFrame(Canvas.from_png(png, screens), canvas)
+
+    def test_every_filter_type(self):
+        canvas = _random_canvas(5, seed=3)
+        png = _browser_png(canvas, cycle=True)
+        self.assertEqual({row[0] for row in _png_rows(png, canvas.width * 4)}, {0, 1, 2, 3, 4})
+        self.assertSameFrame(Canvas.from_png(png, 5), canvas)
+
+    def test_one_bit_png(self):
+        for screens in (1, 5):
+            canvas = _random_canvas(screens, seed=2)
+            png = canvas.to_png()
+            self.assertEqual(png[24:26], b"\x01\x00")  # IHDR: 1-bit grayscale
+            self.assertSameFrame(Canvas.from_png(png, screens), canvas)
+            self.assertSameFrame(Canvas.from_png_base64(canvas.to_png_base64(), screens), canvas)
+
+
+if __name__ == "__main__":
+    unittest.main()
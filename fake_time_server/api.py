@@ -1,14 +1,27 @@
 import json
 import ssl
+import time
+import zlib
+from concurrent.futures import Future
 from urllib.parse import urljoin, urlencode
-from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 
 import config
+from cache import ResponseCache
+from coalesce import OffsetCoalescer
+from jsonstream import RowStream, iter_array
+from metrics import Metrics
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, counts_as_failure
+import tracing
+from transport import HTTPTransport, iter_decoded, read_decoded
 
 
 class TimeServerAPI:
-    def __init__(self, base_url: str | None = None, verify_ssl: bool = False, timeout: int = 6):
+    def __init__(self, base_url: str | None = None, verify_ssl: bool = False, timeout: int = 6,
+                 pool_size: int | None = None, idle_timeout: float | None = None,
+                 cache: ResponseCache | None = None, coalesce_window: float | None = None,
+                 retry: RetryPolicy | None = None, breaker: CircuitBreaker | None = None,
+                 gzip_min_size: int | None = None):
         base = (base_url or getattr(config, "TIMESERVER_URL", "")).rstrip("/") + "/"
         self.base_url = base
         self.timeout = timeout
@@ -18,6 +31,52 @@ class TimeServerAPI:
         else:
             self.ssl_ctx = None
 
+        # Keep-alive connections are reused across calls (and TLS sessions
+        # across reconnects), so multi-call commands pay one handshake.
+        self.transport = HTTPTransport(
+            ssl_ctx=self.ssl_ctx,
+            timeout=timeout,
+            pool_size=pool_size if pool_size is not None else getattr(config, "POOL_SIZE", 4),
+            idle_timeout=idle_timeout if idle_timeout is not None else getattr(config, "POOL_IDLE_TIMEOUT", 30.0),
+        )
+
+        # Optional cache for read endpoints, see cache.DEFAULT_TTLS
+        self.cache = cache
+
+        # Pass RetryPolicy(max_attempts=1) to disable retries. Mutations are
+        # only retried when they never left this machine (see RetryPolicy),
+        # the server has no de-duplication that would make resending safe
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+        # Request bodies of at least this many bytes are gzipped; None = never,
+        # since the server has to understand Content-Encoding on requests
+        self.gzip_min_size = gzip_min_size if gzip_min_size is not None else getattr(config, "GZIP_MIN_SIZE", None)
+
+        # Streamed listings longer than this are not kept for the cache, so
+        # streaming stays bounded in memory; None = cache any length
+        self.stream_cache_rows = getattr(config, "STREAM_CACHE_MAX_ROWS", 1000)
+
+        # Per-endpoint counters and latency histograms, see --stats
+        self.metrics = Metrics()
+
+        # Opt-in: merge offset mutations issued within a short window
+        self.coalescer = OffsetCoalescer(self, coalesce_window) if coalesce_window else None
+
+    def close(self) -> None:
+        if self.coalescer is not None:
+            self.coalescer.close()
+        self.transport.close()
+        if self.cache is not None:
+            self.cache.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
     def _full_url(self, endpoint: str) -> str:
         return urljoin(self.base_url, endpoint.lstrip("/"))
 
@@ -48,8 +107,12 @@ class TimeServerAPI:
 
     def send_request(self, endpoint: str, method: str = "GET",
                      data: dict | None = None, mode: str = "form"):
+        with tracing.span(f"{method.upper()} {endpoint}", "send_request"):
+            return self._send_request(endpoint, method, data, mode)
+
+    def _send_request(self, endpoint: str, method: str, data, mode: str):
         url = self._full_url(endpoint)
-        headers = {"Accept": "application/json"}
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
         body = None
         m = method.upper()
 
@@ -75,23 +138,190 @@ class TimeServerAPI:
                 else:
                     body = None
 
-        req = Request(url, data=body, headers=headers, method=m)
+        ttl = self.cache.ttl_for(endpoint) if (self.cache is not None and m == "GET") else None
+        cached = self.cache.get(url) if ttl is not None else None
+        if cached is not None:
+            if self.cache.is_fresh(cached, ttl):
+                self.metrics.cache_hit(endpoint, m)
+                return cached["value"]
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
 
-        try:
-            with urlopen(req, timeout=self.timeout, context=self.ssl_ctx) as resp:
-                raw = resp.read()
-                charset = resp.headers.get_content_charset() or "utf-8"
-                text = raw.decode(charset, errors="replace")
-                ctype = resp.headers.get("Content-Type", "")
-                if "application/json" in ctype:
-                    return json.loads(text)
+        saved_out = 0
+        if body and self.gzip_min_size is not None and len(body) >= self.gzip_min_size:
+            packed = zlib.compress(body, 6, wbits=16 + zlib.MAX_WBITS)
+            if len(packed) < len(body):
+                saved_out = len(body) - len(packed)
+                body = packed
+                headers["Content-Encoding"] = "gzip"
+
+        sent = len(body) if body else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker is not None and not self.breaker.allow():
+                self.metrics.observe(endpoint, m, 0.0, error=CircuitOpenError())
+                print("Server je nedostupný, požadavek nebyl odeslán (circuit breaker)")
+                return False
+            raw, wire = b"", 0
+            t0 = time.perf_counter()
+            try:
+                with self.transport.urlopen(m, url, body, headers) as resp:
+                    with tracing.span("body_transfer", "net"):
+                        raw, wire = read_decoded(resp)
+                self.metrics.observe(endpoint, m, time.perf_counter() - t0, sent, wire,
+                                     saved=saved_out + len(raw) - wire)
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                break
+            except (HTTPError, URLError, ssl.SSLError, TimeoutError, ConnectionError, zlib.error) as e:
+                self.metrics.observe(endpoint, m, time.perf_counter() - t0, sent, wire, error=e)
+                if self.breaker is not None:
+                    if counts_as_failure(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                breaker_open = self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN
+                if not breaker_open and self.retry is not None and self.retry.should_retry(m, e, attempt):
+                    time.sleep(self.retry.delay(attempt))
+                    continue
+                if self.cache is not None and m != "GET":
+                    # A failed mutation may still have been applied
+                    self.cache.invalidate_after(endpoint)
+                print(e)
+                return False
+
+        if resp.status == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached["value"]
+        charset = resp.headers.get_content_charset() or "utf-8"
+        with tracing.span("charset_decode", "decode", bytes=len(raw)):
+            text = raw.decode(charset, errors="replace")
+        ctype = resp.headers.get("Content-Type", "")
+        if "application/json" in ctype:
+            with tracing.span("json.loads", "decode"):
+                result = json.loads(text)
+        else:
+            try:
+                with tracing.span("json.loads", "decode", ctype=ctype):
+                    result = json.loads(text)
+            except Exception:
+                result = text
+
+        if self.cache is not None:
+            if ttl is not None:
+                self.cache.put(url, endpoint, result,
+                               etag=resp.headers.get("ETag"),
+                               last_modified=resp.headers.get("Last-Modified"))
+            elif m != "GET":
+                self.cache.invalidate_after(endpoint)
+        return result
+
+    def stream_request(self, endpoint: str, data: dict | None = None):
+        """GET a JSON array endpoint and return its rows as a RowStream.
+
+        Rows are decoded straight from the socket as they arrive instead of
+        reading, decoding and parsing the whole body first. Only opening the
+        request is retried; returns False if that fails. Uses the response
+        cache like send_request: fresh entries are served locally, stale
+        ones revalidated, and a completely streamed listing of at most
+        stream_cache_rows rows is stored.
+        """
+        with tracing.span(f"GET {endpoint}", "stream_request"):
+            url = self._full_url(endpoint)
+            if data:
+                url += ("&" if "?" in url else "?") + self._encode_query(data)
+            headers = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+
+            ttl = self.cache.ttl_for(endpoint) if self.cache is not None else None
+            cached = self.cache.get(url) if ttl is not None else None
+            if cached is not None:
+                if self.cache.is_fresh(cached, ttl):
+                    self.metrics.cache_hit(endpoint, "GET")
+                    return self._cached_rows(cached)
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+            attempt = 0
+            while True:
+                attempt += 1
+                if self.breaker is not None and not self.breaker.allow():
+                    self.metrics.observe(endpoint, "GET", 0.0, error=CircuitOpenError())
+                    print("Server je nedostupný, požadavek nebyl odeslán (circuit breaker)")
+                    return False
+                t0 = time.perf_counter()
                 try:
-                    return json.loads(text)
-                except Exception:
-                    return text
-        except (HTTPError, URLError, ssl.SSLError) as e:
-            print(e)
-            return False
+                    resp = self.transport.urlopen("GET", url, None, headers)
+                    break
+                except (HTTPError, URLError, ssl.SSLError, TimeoutError, ConnectionError) as e:
+                    self.metrics.observe(endpoint, "GET", time.perf_counter() - t0, error=e)
+                    if self.breaker is not None:
+                        if counts_as_failure(e):
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                    breaker_open = self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN
+                    if not breaker_open and self.retry is not None and self.retry.should_retry("GET", e, attempt):
+                        time.sleep(self.retry.delay(attempt))
+                        continue
+                    print(e)
+                    return False
+            if resp.status == 304 and cached is not None:
+                with resp:
+                    resp.read()
+                self.metrics.observe(endpoint, "GET", time.perf_counter() - t0)
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                self.cache.touch(url)
+                return self._cached_rows(cached)
+        return RowStream(self._stream_rows(endpoint, resp, t0, url if ttl is not None else None))
+
+    @staticmethod
+    def _cached_rows(entry: dict) -> RowStream:
+        value = entry["value"]
+        return RowStream(iter(value if isinstance(value, list) else ()))
+
+    def _stream_rows(self, endpoint: str, resp, t0: float, cache_key: str | None = None):
+        counts = [0, 0]  # wire, decoded
+        # Rows are kept for the cache only, stored only if the listing was
+        # read to the end, and dropped once there are too many to buffer
+        rows = [] if cache_key is not None else None
+        limit = self.stream_cache_rows
+
+        def chunks():
+            for chunk, wire in iter_decoded(resp):
+                counts[0] += wire
+                counts[1] += len(chunk)
+                yield chunk
+
+        error = None
+        try:
+            with resp, tracing.span("body_stream", "net"):
+                for row in iter_array(chunks(), resp.headers.get_content_charset() or "utf-8"):
+                    if rows is not None:
+                        if limit is not None and len(rows) >= limit:
+                            rows = None
+                        else:
+                            rows.append(row)
+                    yield row
+            if rows is not None:
+                self.cache.put(cache_key, endpoint, rows, etag=resp.headers.get("ETag"),
+                               last_modified=resp.headers.get("Last-Modified"))
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.metrics.observe(endpoint, "GET", time.perf_counter() - t0, 0, counts[0],
+                                 error=error, saved=counts[1] - counts[0])
+            if self.breaker is not None:
+                if error is not None and counts_as_failure(error):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
 
     @staticmethod
     def format_time(seconds: int | float) -> str:
@@ -143,33 +373,70 @@ class TimeServerAPI:
                     return self._to_bool(resp[k])
         return self._to_bool(resp)
 
-    def list_user_times(self):
-        # /api/display/show_times [GET]
+    def list_user_times(self, stream: bool = False):
+        # /api/display/show_times [GET], stream=True returns a RowStream
+        if stream:
+            return self.stream_request("display/show_times")
         return self.send_request("display/show_times", "GET")
 
-    def list_users(self):
+    def list_users(self, stream: bool = False):
         # /api/admin/list_users [GET]
+        if stream:
+            return self.stream_request("admin/list_users")
         return self.send_request("admin/list_users", "GET")
 
     def list_user_cat(self):
         # /api/admin/list_categories [GET]
         return self.send_request("admin/list_categories", "GET")
 
-    def list_logs(self):
-        # /api/misc/get_logs [GET]
-        return self.send_request("misc/get_logs", "GET")
+    def list_logs(self, since_id: int | None = None, stream: bool = False):
+        # /api/misc/get_logs [GET], since_id asks only for newer rows
+        # (older servers ignore it and return the whole log)
+        data = {"since_id": since_id} if since_id else None
+        if stream:
+            return self.stream_request("misc/get_logs", data)
+        return self.send_request("misc/get_logs", "GET", data)
 
     def apply_offset_user(self, user_id: int, offset: int) -> bool:
-        # /api/admin/bulk_add_user_time [POST]
-        payload = {"user_ids": [user_id], "time_offset": str(offset)}
+        if self.coalescer is not None:
+            return self.coalescer.add_user(user_id, offset).result()
+        return self.apply_offset_users([user_id], offset)
+
+    def queue_offset_user(self, user_id: int, offset: int) -> Future:
+        # Non-blocking variant, resolves to the result of the (merged) request
+        if self.coalescer is not None:
+            return self.coalescer.add_user(user_id, offset)
+        fut = Future()
+        fut.set_result(self.apply_offset_users([user_id], offset))
+        return fut
+
+    def apply_offset_users(self, user_ids: list, offset: int) -> bool:
+        # /api/admin/bulk_add_user_time [POST], one offset for all users
+        payload = {"user_ids": list(user_ids), "time_offset": str(offset)}
         resp = self.send_request("admin/bulk_add_user_time", "POST", payload, "json")
         if resp is False:
             return False
         return True
 
     def apply_offset_cat(self, cat_id: int, offset: int) -> bool:
-        # /api/admin/bulk_add_user_time_category [POST]
-        payload = {"ids": [cat_id], "time_offset": str(offset)}
+        if self.coalescer is not None:
+            return self.coalescer.add_cat(cat_id, offset).result()
+        return self.apply_offset_cats([cat_id], offset)
+
+    def queue_offset_cat(self, cat_id: int, offset: int) -> Future:
+        if self.coalescer is not None:
+            return self.coalescer.add_cat(cat_id, offset)
+        fut = Future()
+        fut.set_result(self.apply_offset_cats([cat_id], offset))
+        return fut
+
+    def flush_offsets(self) -> None:
+        if self.coalescer is not None:
+            self.coalescer.flush()
+
+    def apply_offset_cats(self, cat_ids: list, offset: int) -> bool:
+        # /api/admin/bulk_add_user_time_category [POST], one offset for all categories
+        payload = {"ids": list(cat_ids), "time_offset": str(offset)}
         resp = self.send_request("admin/bulk_add_user_time_category", "POST", payload, "json")
         if resp is False:
             return False
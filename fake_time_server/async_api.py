@@ -0,0 +1,115 @@
+import asyncio
+import functools
+
+from api import TimeServerAPI
+
+
+class AsyncTimeServerAPI:
+    """asyncio counterpart of TimeServerAPI.
+
+    Blocking calls run in worker threads and share the keep-alive pool of the
+    wrapped TimeServerAPI, so only the standard library is needed. At most
+    `max_concurrency` requests are in flight at once.
+    """
+
+    def __init__(self, api: TimeServerAPI | None = None, max_concurrency: int = 4, **kwargs):
+        self.api = api if api is not None else TimeServerAPI(**kwargs)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._sem = None
+
+    async def _call(self, fn, *args):
+        if self._sem is None:
+            # Created lazily so it binds to the running event loop
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        async with self._sem:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+    async def gather(self, *calls, return_exceptions: bool = False):
+        """Run several calls concurrently, results in argument order.
+
+        Each call is either a coroutine or a (method_name, *args) tuple,
+        e.g. gather(("list_users",), ("list_user_times",)).
+        """
+        aws = []
+        for c in calls:
+            if isinstance(c, tuple):
+                name, *args = c
+                aws.append(getattr(self, name)(*args))
+            else:
+                aws.append(c)
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    async def send_request(self, endpoint: str, method: str = "GET",
+                           data: dict | None = None, mode: str = "form"):
+        return await self._call(self.api.send_request, endpoint, method, data, mode)
+
+    format_time = staticmethod(TimeServerAPI.format_time)
+
+    async def get_system_active(self) -> bool:
+        return await self._call(self.api.get_system_active)
+
+    async def list_user_times(self):
+        return await self._call(self.api.list_user_times)
+
+    async def list_users(self):
+        return await self._call(self.api.list_users)
+
+    async def list_user_cat(self):
+        return await self._call(self.api.list_user_cat)
+
+    async def list_logs(self, since_id: int | None = None):
+        return await self._call(self.api.list_logs, since_id)
+
+    async def apply_offset_user(self, user_id: int, offset: int) -> bool:
+        return await self._call(self.api.apply_offset_user, user_id, offset)
+
+    async def apply_offset_users(self, user_ids: list, offset: int) -> bool:
+        return await self._call(self.api.apply_offset_users, user_ids, offset)
+
+    async def apply_offset_cat(self, cat_id: int, offset: int) -> bool:
+        return await self._call(self.api.apply_offset_cat, cat_id, offset)
+
+    async def apply_offset_cats(self, cat_ids: list, offset: int) -> bool:
+        return await self._call(self.api.apply_offset_cats, cat_ids, offset)
+
+    async def set_active(self, new_state: bool) -> bool:
+        return await self._call(self.api.set_active, new_state)
+
+    async def deactivate_system(self) -> bool:
+        success = False
+        if await self.get_system_active():
+            success = await self.set_active(False)
+        else:
+            print("System already deactivated")
+        return success
+
+    async def get_time_allocation(self) -> int:
+        return await self._call(self.api.get_time_allocation)
+
+    async def split_allocated_evenly(self):
+        # Both reads are independent, fetch them in one round-trip window
+        users, total_time = await self.gather(("list_user_times",), ("get_time_allocation",))
+        if users is False or users is None:
+            return False
+        num_users = len(users) if isinstance(users, (list, dict)) else 0
+        if num_users == 0:
+            print("No users to allocate to.")
+            return False
+        offset = int(total_time // num_users)
+        print("Applying offset to each user:", offset)
+        # Category id 0 = "all users"
+        return await self.apply_offset_cat(0, offset)
+
+    async def show_web_admin(self):
+        return self.api.show_web_admin()
+
+    def close(self) -> None:
+        self.api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
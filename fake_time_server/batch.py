@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+import os
+
+
+_USER_KEYS = ("user_id", "user", "uid")
+_CAT_KEYS = ("category_id", "cat_id", "category")
+
+
+def _parse_record(line_no: int, rec: dict) -> dict:
+    row = {"line": line_no, "kind": None, "id": None, "offset": None, "error": None}
+    try:
+        keys = {str(k).strip().lower(): v for k, v in rec.items() if v not in (None, "")}
+        user = next((keys[k] for k in _USER_KEYS if k in keys), None)
+        cat = next((keys[k] for k in _CAT_KEYS if k in keys), None)
+        if (user is None) == (cat is None):
+            raise ValueError("expected exactly one of user_id/category_id")
+        row["kind"] = "user" if user is not None else "category"
+        row["id"] = int(user if user is not None else cat)
+        row["offset"] = int(str(keys["offset"]).strip().replace("_", ""))
+    except KeyError:
+        row["error"] = "missing offset"
+    except (TypeError, ValueError) as e:
+        row["error"] = str(e)
+    return row
+
+
+def read_batch(path: str) -> list:
+    """Rows of a CSV (with header), JSON array or JSONL offset file.
+
+    Each row is a dict with line, kind ("user"/"category"), id, offset and
+    error (set for rows that could not be parsed); for a JSON array, line
+    is the 1-based item number. Raises ValueError if a JSON array file is
+    not valid JSON.
+    """
+    rows = []
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".json":
+            text = f.read()
+            if text.lstrip().startswith("["):
+                items = json.loads(text)
+                return [_parse_record(n, rec if isinstance(rec, dict) else {}) for n, rec in enumerate(items, 1)]
+            f = io.StringIO(text)  # one object per line, as .jsonl
+        if ext in (".jsonl", ".ndjson", ".json"):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError as e:
+                    rows.append({"line": line_no, "kind": None, "id": None, "offset": None, "error": str(e)})
+                    continue
+                rows.append(_parse_record(line_no, rec if isinstance(rec, dict) else {}))
+        else:
+            for line_no, rec in enumerate(csv.DictReader(f), 2):
+                rows.append(_parse_record(line_no, rec))
+    return rows
+
+
+def group_rows(rows) -> list:
+    """Bulk calls as (kind, offset, [rows]) - one per shared offset.
+
+    An ID listed twice with the same offset must be applied twice, so it
+    goes into a separate call rather than being collapsed by the server.
+    """
+    chunks = {}  # (kind, offset) -> [(ids, rows), ...]
+    for r in rows:
+        if r["error"]:
+            continue
+        slots = chunks.setdefault((r["kind"], r["offset"]), [])
+        for ids, members in slots:
+            if r["id"] not in ids:
+                ids.add(r["id"])
+                members.append(r)
+                break
+        else:
+            slots.append(({r["id"]}, [r]))
+    return [(kind, offset, members)
+            for (kind, offset), slots in chunks.items()
+            for _, members in slots]
+
+
+async def apply_groups(api, groups) -> None:
+    """Send all groups through an AsyncTimeServerAPI, store status per row."""
+    calls = []
+    for kind, offset, members in groups:
+        ids = [r["id"] for r in members]
+        if kind == "user":
+            calls.append(api.apply_offset_users(ids, offset))
+        else:
+            calls.append(api.apply_offset_cats(ids, offset))
+    results = await api.gather(*calls, return_exceptions=True)
+    for (_, _, members), ok in zip(groups, results):
+        for r in members:
+            if isinstance(ok, BaseException):
+                r["error"] = str(ok)
+            elif not ok:
+                r["error"] = "request failed"
+            r["ok"] = ok is True
+
+
+def write_report(path: str, rows) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["line", "kind", "id", "offset", "status", "error"])
+        for r in rows:
+            w.writerow([r["line"], r["kind"] or "", "" if r["id"] is None else r["id"],
+                        "" if r["offset"] is None else r["offset"],
+                        "ok" if r.get("ok") else "failed", r["error"] or ""])
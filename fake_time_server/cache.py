@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, saving is then only atomic, not merged under a lock
+    fcntl = None
+
+
+# Seconds a cached GET response is served without asking the server.
+# Endpoints not listed here are never cached.
+DEFAULT_TTLS = {
+    "admin/list_users": 60,
+    "admin/list_categories": 300,
+    "display/show_times": 5,
+    "misc/get_allocated_time": 10,
+    "misc/get_active": 5,
+}
+
+# Which cached endpoints a successful mutating call makes stale.
+# Mutations not listed here drop the whole cache.
+INVALIDATES = {
+    "admin/bulk_add_user_time": ("admin/list_users", "display/show_times", "misc/get_allocated_time"),
+    "admin/bulk_add_user_time_category": ("admin/list_users", "display/show_times", "misc/get_allocated_time"),
+    "misc/set_active": ("misc/get_active", "display/show_times"),
+}
+
+_ALL = "*"  # key in ResponseCache._invalidated for "everything"
+
+
+class ResponseCache:
+    """LRU cache of decoded GET responses with per-endpoint TTLs.
+
+    Entries keep the ETag/Last-Modified validators so stale entries can be
+    revalidated with a conditional request. Optionally persisted as JSON;
+    save() merges with the file under a lock, so entries and invalidations
+    from other processes sharing it are not lost. With ttls={} nothing is
+    cached but mutations still invalidate the file (--no-cache).
+    """
+
+    def __init__(self, path: str | None = None, ttls: dict | None = None, max_entries: int = 64):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()  # key -> {"endpoint", "value", "etag", "last_modified", "stored_at"}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._changed = set()  # keys put/touched by this process
+        self._invalidated = {}  # endpoint or _ALL -> time of the last invalidation
+        if path:
+            self.load()
+
+    def ttl_for(self, endpoint: str) -> float | None:
+        return self.ttls.get(endpoint.strip("/"))
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    @staticmethod
+    def is_fresh(entry: dict, ttl: float) -> bool:
+        # Wall clock on purpose: entries survive between CLI runs
+        return 0 <= time.time() - entry["stored_at"] < ttl
+
+    def put(self, key: str, endpoint: str, value, etag: str | None = None,
+            last_modified: str | None = None) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "endpoint": endpoint.strip("/"),
+                "value": value,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._changed.add(key)
+            self._dirty = True
+
+    def touch(self, key: str) -> None:
+        """Mark an entry fresh again after a 304 Not Modified."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["stored_at"] = time.time()
+                self._entries.move_to_end(key)
+                self._changed.add(key)
+                self._dirty = True
+
+    def invalidate(self, endpoints=None) -> None:
+        """Drop entries of the given endpoints, or everything if None."""
+        now = time.time()
+        with self._lock:
+            self._dirty = True
+            if endpoints is None:
+                self._entries.clear()
+                self._invalidated[_ALL] = now
+                return
+            names = {e.strip("/") for e in endpoints}
+            for name in names:
+                self._invalidated[name] = now
+            for key in [k for k, e in self._entries.items() if e["endpoint"] in names]:
+                del self._entries[key]
+
+    def invalidate_after(self, endpoint: str) -> None:
+        self.invalidate(INVALIDATES.get(endpoint.strip("/")))
+
+    def _read(self) -> OrderedDict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return OrderedDict(json.load(f).get("entries", []))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return OrderedDict()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        entries = self._read()
+        with self._lock:
+            self._entries = entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _merge(self, disk: OrderedDict) -> OrderedDict:
+        # Call with self._lock held. Disk entries older than one of our
+        # invalidations go, our own puts/touches win over older disk copies;
+        # entries we only loaded are not written back, so another process's
+        # invalidation of them sticks.
+        everything = self._invalidated.get(_ALL, 0)
+        for key, e in list(disk.items()):
+            if e.get("stored_at", 0) < max(everything, self._invalidated.get(e.get("endpoint"), 0)):
+                del disk[key]
+        for key in self._changed:
+            mine = self._entries.get(key)
+            if mine is None:
+                continue
+            theirs = disk.get(key)
+            if theirs is None or theirs.get("stored_at", 0) <= mine["stored_at"]:
+                disk[key] = mine
+                disk.move_to_end(key)
+        while len(disk) > self.max_entries:
+            disk.popitem(last=False)
+        return disk
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        d = os.path.dirname(self.path)
+        tmp = None
+        lock = None
+        try:
+            if d:
+                os.makedirs(d, exist_ok=True)
+            if fcntl is not None:
+                lock = open(self.path + ".lock", "a")
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            with self._lock:
+                self._entries = self._merge(self._read())
+                data = {"entries": list(self._entries.items())}
+                self._changed.clear()
+                self._invalidated.clear()
+                self._dirty = False
+            fd, tmp = tempfile.mkstemp(prefix=".intime_cache_", dir=d if d else None)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception:
+            # Best-effort only
+            try:
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+            except Exception:
+                pass
+        finally:
+            if lock is not None:
+                lock.close()  # releases the flock
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Thin client for `time_server.py --daemon`: forwards the command line over
+# the daemon's Unix socket, so no API client or TLS setup happens here.
+
+import os
+import sys
+
+from daemon import forward, socket_path
+
+
+# File arguments are opened by the daemon, which has its own working directory
+_PATH_OPTIONS = ("--apply_batch", "--report", "--stats-file")
+
+
+def prepare_argv(argv):
+    """Return (argv to forward, socket path): --socket is taken out, file
+    arguments are made absolute against the caller's working directory."""
+    out = []
+    path = None
+    args = iter(argv)
+    for a in args:
+        name, eq, value = a.partition("=")
+        if name == "--socket":
+            path = value if eq else next(args, None)
+            continue
+        if name in _PATH_OPTIONS:
+            if not eq:
+                value = next(args, None)
+            if value is None:
+                out.append(a)  # let the daemon's parser report it
+                continue
+            out.append(f"{name}={os.path.abspath(os.path.expanduser(value))}")
+            continue
+        out.append(a)
+    return out, path or socket_path()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    argv, path = prepare_argv(argv)
+    try:
+        return forward(argv, path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("Démon neběží, spusťte: time_server.py --daemon", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
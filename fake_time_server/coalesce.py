@@ -0,0 +1,91 @@
+import atexit
+import threading
+from concurrent.futures import Future
+
+
+class OffsetCoalescer:
+    """Buffers offset mutations and sends them as few bulk calls as possible.
+
+    Adds to the same user (or category) within `window` seconds are summed,
+    then targets sharing an identical total offset go out in one
+    bulk_add_user_time(_category) request. The buffer is flushed when the
+    window expires, when `max_ops` operations are pending, or on close/exit.
+    Every queued operation gets a Future resolving to True/False.
+    """
+
+    def __init__(self, api, window: float = 0.2, max_ops: int = 100):
+        self.api = api
+        self.window = window
+        self.max_ops = max(1, int(max_ops))
+        self._lock = threading.Lock()
+        self._pending = {"user": {}, "category": {}}  # kind -> id -> [offset_sum, [futures]]
+        self._count = 0
+        self._timer = None
+        self._closed = False
+        atexit.register(self.flush)
+
+    def add_user(self, user_id: int, offset: int) -> Future:
+        return self._add("user", user_id, offset)
+
+    def add_cat(self, cat_id: int, offset: int) -> Future:
+        return self._add("category", cat_id, offset)
+
+    def _add(self, kind: str, target: int, offset: int) -> Future:
+        fut = Future()
+        flush_now = False
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("coalescer is closed")
+            slot = self._pending[kind].setdefault(target, [0, []])
+            slot[0] += int(offset)
+            slot[1].append(fut)
+            self._count += 1
+            if self._count >= self.max_ops:
+                flush_now = True
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+        return fut
+
+    def flush(self) -> None:
+        with self._lock:
+            pending = self._pending
+            self._pending = {"user": {}, "category": {}}
+            self._count = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for kind, targets in pending.items():
+            by_offset = {}
+            for target, (offset, futures) in targets.items():
+                by_offset.setdefault(offset, []).append((target, futures))
+            for offset, members in by_offset.items():
+                if offset == 0:
+                    # Adds cancelled each other out, nothing to send
+                    ok = True
+                else:
+                    ids = [t for t, _ in members]
+                    try:
+                        if kind == "user":
+                            ok = self.api.apply_offset_users(ids, offset)
+                        else:
+                            ok = self.api.apply_offset_cats(ids, offset)
+                    except Exception as e:
+                        for _, futures in members:
+                            for f in futures:
+                                f.set_exception(e)
+                        continue
+                for _, futures in members:
+                    for f in futures:
+                        f.set_result(bool(ok))
+
+    def close(self) -> None:
+        # Close before the final flush: anything _add accepted is already in
+        # _pending by then, and later adds raise instead of being stranded
+        with self._lock:
+            self._closed = True
+        self.flush()
+        atexit.unregister(self.flush)
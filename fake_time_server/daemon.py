@@ -0,0 +1,164 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+
+
+# Daemon -> client frames: 1-byte channel, 4-byte big-endian length, payload.
+# stdout and stderr stay apart, so `client.py ... 2>/dev/null` pipes clean
+# CSV/JSON; the last frame carries the exit code as ASCII.
+STDOUT, STDERR, EXIT = b"1", b"2", b"x"
+_FRAME = struct.Struct(">cI")
+
+
+class _Channel(io.RawIOBase):
+    """Writable stream that sends everything written as frames of one channel."""
+
+    def __init__(self, wfile, channel: bytes):
+        self.wfile = wfile
+        self.channel = channel
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self.wfile.write(_FRAME.pack(self.channel, len(data)) + data)
+        self.wfile.flush()
+        return len(data)
+
+
+def socket_path() -> str:
+    import config
+    return os.path.expanduser(getattr(config, "CLI_SOCKET", "/tmp/.intime_cli.sock"))
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            argv = json.loads(line)
+        except ValueError:
+            return
+        out = io.TextIOWrapper(_Channel(self.wfile, STDOUT), encoding="utf-8", errors="replace",
+                               line_buffering=True, write_through=True)
+        err = io.TextIOWrapper(_Channel(self.wfile, STDERR), encoding="utf-8", errors="replace",
+                               line_buffering=True, write_through=True)
+        inp = io.TextIOWrapper(self.rfile, encoding="utf-8", errors="replace")
+        code = 1
+        try:
+            # Commands print and prompt through sys.std*, point those at the client
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                old_stdin, sys.stdin = sys.stdin, inp
+                try:
+                    code = self.server.run(argv)
+                except SystemExit as e:  # argparse errors and --help
+                    code = e.code if isinstance(e.code, int) else 1
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                except Exception as e:
+                    print("Chyba:", e)
+                    code = 1
+                finally:
+                    sys.stdin = old_stdin
+            out.flush()
+            err.flush()
+            _Channel(self.wfile, EXIT).write(str(code).encode())
+        except OSError:
+            pass
+        finally:
+            for stream in (out, err, inp):
+                with contextlib.suppress(ValueError, OSError):
+                    stream.detach()
+
+
+class DaemonRunningError(OSError):
+    """Another daemon already answers on the socket path."""
+
+
+def _claim_socket_path(path: str) -> None:
+    # A leftover socket of a crashed daemon is removed, a live one is not
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} existuje a není socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise DaemonRunningError(f"na {path} už běží jiný démon")
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """Runs CLI commands sent over a Unix socket, one at a time.
+
+    Commands share module-level state and sys.stdout, so they are served
+    sequentially; the API client and its warm connections live on.
+    Raises DaemonRunningError if a daemon already listens on path.
+    """
+
+    def __init__(self, path: str, run):
+        self.run = run
+        _claim_socket_path(path)
+        super().__init__(path, _CommandHandler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+
+def forward(argv, path: str | None = None) -> int:
+    """Client side: send argv to the daemon, stream output back, return exit code."""
+    import threading
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path or socket_path())
+    sock.sendall((json.dumps(list(argv)) + "\n").encode("utf-8"))
+
+    def pump_stdin():
+        # Answers to interactive prompts
+        try:
+            for data in iter(sys.stdin.readline, ""):
+                sock.sendall(data.encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+
+    code = 1
+    streams = {STDOUT: sys.stdout.buffer, STDERR: sys.stderr.buffer}
+    rfile = sock.makefile("rb")
+    try:
+        while True:
+            head = rfile.read(_FRAME.size)
+            if len(head) < _FRAME.size:
+                break  # daemon went away without an exit code
+            channel, length = _FRAME.unpack(head)
+            data = rfile.read(length)
+            if channel == EXIT:
+                code = int(data or 1)
+                break
+            stream = streams.get(channel)
+            if stream is not None:
+                stream.write(data)
+                stream.flush()
+    finally:
+        rfile.close()
+        sock.close()
+    return code
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from api import TimeServerAPI
+from timecalc import UserTimes, match_user_ids
+
+
+DASHBOARD_HEADERS = ["ID", "Jméno", "Zbývá(s)", "Zbývá(fmt)", "Stav"]
+CATEGORY_HEADERS = ["ID", "Kategorie", "Členů", "Mrtvých", "Zbývá celkem", "Zbývá průměr"]
+SORT_KEYS = ("remaining", "name", "id")
+
+# Category 0 stands for "all users" (same as in bulk_add_user_time_category)
+ALL_USERS = 0
+
+# Neither admin/list_users ([id, tag, name, acro, offset, start, active]) nor
+# admin/list_categories ([id, name]) says which users a category holds
+MEMBERSHIP_UNKNOWN = ("Server neposkytuje členství uživatelů v kategoriích, "
+                      "dashboard umí jen kategorii 0 (všichni).")
+
+
+class Dashboard:
+    """Users and their remaining time joined into one report.
+
+    users/times/categories are the admin/list_users, display/show_times and
+    admin/list_categories payloads. Times are matched to user IDs with
+    timecalc.match_user_ids; categories only resolve names, since the API
+    has no membership, so aggregates exist for category 0 only.
+    """
+
+    def __init__(self, users, times, categories, now: datetime | None = None):
+        self.cat_names = {c[0]: c[1] for c in categories}
+        ut = UserTimes(times)
+        remaining = ut.compute(now)["remaining"].tolist()
+        ids = match_user_ids(users, [ut.items[pos] for pos in ut.index])
+        self.rows = [[uid, name, left] for uid, name, left in zip(ids, ut.names, remaining)]  # [id, name, remaining]
+
+    def category_stats(self) -> list:
+        """[id, name, members, dead, total remaining, mean remaining] of category 0."""
+        left = [r[2] for r in self.rows]
+        total = sum(left)
+        return [[ALL_USERS, self.cat_names.get(ALL_USERS, "Všichni"), len(left),
+                 sum(1 for r in left if r == 0), total, total // len(left) if left else 0]]
+
+    def category_id(self, key: str):
+        """Resolve a category given by ID or (case-insensitive) name."""
+        key = str(key).strip()
+        if key.lstrip("-").isdigit() and int(key) in self.cat_names:
+            return int(key)
+        for cid, name in self.cat_names.items():
+            if str(name).lower() == key.lower():
+                return cid
+        return None
+
+    def user_rows(self, category=None, below: int | None = None, sort: str = "remaining") -> list:
+        """Rows of DASHBOARD_HEADERS, optionally filtered and sorted.
+
+        Raises ValueError(MEMBERSHIP_UNKNOWN) for any category but 0.
+        """
+        if category is not None and category != ALL_USERS:
+            raise ValueError(MEMBERSHIP_UNKNOWN)
+        rows = self.rows
+        if below is not None:
+            rows = [r for r in rows if r[2] < below]
+        if sort == "name":
+            rows = sorted(rows, key=lambda r: str(r[1]))
+        elif sort == "id":
+            rows = sorted(rows, key=lambda r: (r[0] is None, r[0] or 0))
+        else:
+            rows = sorted(rows, key=lambda r: r[2])
+        fmt = TimeServerAPI.format_time
+        return [["-" if uid is None else uid, name, left, fmt(left), "DEAD" if left == 0 else ""]
+                for uid, name, left in rows]
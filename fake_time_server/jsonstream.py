@@ -0,0 +1,115 @@
+import codecs
+import json
+import ssl
+import zlib
+from urllib.error import URLError
+
+
+_WS = " \t\r\n"
+_DELIMS = _WS + ",]"
+_decoder = json.JSONDecoder()
+
+
+def iter_array(chunks, encoding: str = "utf-8"):
+    """Yield the elements of a top-level JSON array from an iterable of bytes.
+
+    Elements are decoded as soon as they are complete, so only one element
+    (plus the unread part of the current chunk) is buffered at a time. A
+    payload that is not an array is parsed whole; a list is still yielded
+    row by row, anything else raises ValueError.
+    """
+    dec = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buf = ""
+    pos = 0
+    state = "start"  # start -> item <-> comma -> end
+    chunks = iter(chunks)
+    done = False
+    while True:
+        if not done:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                chunk, done = b"", True
+            buf = buf[pos:] + dec.decode(chunk, final=done)
+            pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos >= len(buf):
+                break
+            if state == "start":
+                if buf[pos] != "[":
+                    break  # not an array, handled below once all is read
+                pos += 1
+                state = "item"
+            elif state == "comma":
+                c = buf[pos]
+                pos += 1
+                if c == "]":
+                    state = "end"
+                elif c == ",":
+                    state = "item"
+                else:
+                    raise ValueError(f"expected ',' or ']' at offset {pos - 1}")
+            elif state == "item":
+                if buf[pos] == "]":
+                    pos += 1
+                    state = "end"
+                    continue
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if done:
+                        raise
+                    break  # element not complete yet
+                if not done and (end >= len(buf) or buf[end] not in _DELIMS):
+                    break  # a number like "1.5e" may continue in the next chunk
+                pos = end
+                state = "comma"
+                yield value
+            else:
+                raise ValueError(f"extra data at offset {pos}")
+        if state == "start" and pos < len(buf) and buf[pos] != "[":
+            if not done:
+                continue
+            value = json.loads(buf[pos:])
+            if not isinstance(value, list):
+                raise ValueError("expected a JSON array")
+            yield from value
+            return
+        if done:
+            if state not in ("end", "start"):
+                raise ValueError("unterminated JSON array")
+            return
+
+
+class RowStream:
+    """Iterator over the rows of a streamed list response.
+
+    A transfer or decode error ends the iteration early; it is printed like
+    any other request error and `failed` is set so callers can tell a short
+    listing from a complete one.
+    """
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.failed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise
+        except (URLError, ssl.SSLError, TimeoutError, ConnectionError, ValueError, zlib.error) as e:
+            self.failed = True
+            print(e)
+            raise StopIteration
+
+    def close(self) -> None:
+        # Cached listings are plain list iterators with nothing to close
+        close = getattr(self._rows, "close", None)
+        if close is not None:
+            close()
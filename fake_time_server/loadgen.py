@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Fleet load generator: simulates N flip-dot displays and M time terminals
+# hitting a time server the way the firmware does, then reports throughput,
+# latency percentiles and error rates per endpoint.
+
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+# Where the terminal and display firmware send requests (SERVER_HOST in the .ino files)
+DEVICE_URL = "http://192.168.50.1:5000/api/"
+
+
+def _decode_body(head: bytes, body: bytes) -> bytes:
+    """Undo Transfer-Encoding: chunked; raises ValueError on a malformed body."""
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip().lower()
+    if b"chunked" not in headers.get(b"transfer-encoding", b""):
+        return body
+    out = bytearray()
+    pos = 0
+    while True:
+        end = body.find(b"\r\n", pos)
+        if end < 0:
+            raise ValueError("truncated chunked body")
+        size = int(body[pos:end].split(b";", 1)[0], 16)
+        if size == 0:
+            return bytes(out)
+        start = end + 2
+        if len(body) < start + size:
+            raise ValueError("truncated chunked body")
+        out += body[start:start + size]
+        pos = start + size + 2
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}  # error class -> count
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * q / 100.0), len(ordered) - 1)]
+
+
+class LoadGenerator:
+    """Each simulated device opens a fresh connection per request, like the
+    ESP8266/ESP32 HTTPClient does with http.begin()/http.end()."""
+
+    def __init__(self, base_url: str, displays: int = 5, terminals: int = 5,
+                 display_names=("buse5p",), poll_interval: float = 0.5,
+                 terminal_think: tuple = (2.0, 8.0), timeout: float = 5.0,
+                 coin_tags_file: str | None = None):
+        self.base = urlsplit(base_url.rstrip("/") + "/")
+        self.displays = displays
+        self.terminals = terminals
+        self.display_names = list(display_names)
+        self.poll_interval = poll_interval
+        self.terminal_think = terminal_think
+        self.timeout = timeout
+        self.ssl_ctx = None
+        if self.base.scheme == "https":
+            self.ssl_ctx = ssl._create_unverified_context()
+        self.stats = {}
+        self.user_tags = []
+        self.coin_tags_file = coin_tags_file
+        self.coin_tags = []        # not yet spent in this run
+        self.spent_coin_tags = []
+        self._stop = False
+
+    def _record(self, name: str, latency: float | None, error: str | None) -> None:
+        st = self.stats.setdefault(name, EndpointStats())
+        if error is None:
+            st.latencies.append(latency)
+        else:
+            st.errors[error] = st.errors.get(error, 0) + 1
+
+    async def request(self, name: str, endpoint: str, params: dict | None = None) -> bytes | None:
+        """GET base/endpoint?params, record latency under `name`, return body."""
+        path = self.base.path + endpoint
+        if params:
+            path += "?" + urlencode(params)
+        host = self.base.hostname
+        port = self.base.port or (443 if self.ssl_ctx else 80)
+        t0 = time.perf_counter()
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self.ssl_ctx), self.timeout)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+            raw = await asyncio.wait_for(reader.read(), self.timeout)
+        except asyncio.TimeoutError:
+            self._record(name, None, "timeout")
+            return None
+        except (ConnectionError, OSError) as e:
+            self._record(name, None, type(e).__name__)
+            return None
+        finally:
+            if writer is not None:
+                writer.close()
+        head, _, body = raw.partition(b"\r\n\r\n")
+        try:
+            status = int(head.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            self._record(name, None, "bad_response")
+            return None
+        if status >= 400:
+            self._record(name, None, f"http_{status}")
+            return None
+        try:
+            body = _decode_body(head, body)
+        except ValueError:
+            self._record(name, None, "bad_response")
+            return None
+        self._record(name, time.perf_counter() - t0, None)
+        return body
+
+    async def _display(self, idx: int) -> None:
+        name = self.display_names[idx % len(self.display_names)]
+        await asyncio.sleep(random.uniform(0, self.poll_interval))
+        while not self._stop:
+            await self.request("display/display_output", f"display/display_output/{name}", {"format": "base64"})
+            await asyncio.sleep(self.poll_interval)
+
+    async def _terminal(self, idx: int) -> None:
+        rnd = random.Random(idx)
+        await asyncio.sleep(rnd.uniform(*self.terminal_think))
+        while not self._stop:
+            user = rnd.choice(self.user_tags) if self.user_tags else f"{rnd.getrandbits(32):08X}"
+            action = rnd.random()
+            # Checking the balance is the most common terminal action
+            if action < 0.6:
+                await self.request("nodes/search_tags", "nodes/search_tags", {"tag_id": user})
+            elif action < 0.8:
+                await self.request("nodes/subtract_time", "nodes/subtract_time",
+                                   {"time_to_subtract": rnd.choice((60, 300, 600)), "user_tag_id": user})
+            else:
+                await self.request("nodes/add_coinval", "nodes/add_coinval",
+                                   {"coin_tag_id": self._coin_tag(rnd), "user_tag_id": user})
+            await asyncio.sleep(rnd.uniform(*self.terminal_think))
+
+    async def _load_tags(self) -> None:
+        body = await self.request("admin/list_users", "admin/list_users")
+        try:
+            self.user_tags = [u[1] for u in json.loads(body)]
+        except (ValueError, IndexError, TypeError):
+            self.user_tags = []
+        if not self.user_tags:
+            # Unknown tags take a different (cheaper) path on the server
+            print("Nepodařilo se načíst tagy uživatelů (admin/list_users), terminály posílají náhodné tagy.",
+                  file=sys.stderr)
+
+    def _coin_tag(self, rnd: random.Random) -> str:
+        # A coin is only credited once; after that the server rejects it
+        # without writing, so hand out unspent tags first
+        if self.coin_tags:
+            tag = self.coin_tags.pop()
+            self.spent_coin_tags.append(tag)
+            return tag
+        if self.spent_coin_tags:
+            return rnd.choice(self.spent_coin_tags)
+        return f"{rnd.getrandbits(32):08X}"
+
+    def _load_coin_tags(self) -> None:
+        # The API has no coin listing, so the tags come from a file: one per
+        # line (first CSV column), e.g. from local_server.py --dump-coins
+        tags = []
+        if self.coin_tags_file:
+            try:
+                with open(self.coin_tags_file, encoding="utf-8") as f:
+                    tags = [line.split(",", 1)[0].strip() for line in f]
+            except (OSError, UnicodeDecodeError):
+                tags = []
+        self.coin_tags = [t for t in tags if t and not t.startswith("#")]
+        random.shuffle(self.coin_tags)
+        self.spent_coin_tags = []
+        if not self.coin_tags:
+            # Unknown tags take a different (cheaper) path on the server
+            print(f"Nepodařilo se načíst tagy mincí ({self.coin_tags_file or '--coin-tags'}), "
+                  "terminály posílají náhodné tagy.", file=sys.stderr)
+
+    async def run(self, duration: float) -> float:
+        await self._load_tags()
+        self._load_coin_tags()
+        self.stats.clear()
+        tasks = [asyncio.create_task(self._display(i)) for i in range(self.displays)]
+        tasks += [asyncio.create_task(self._terminal(i)) for i in range(self.terminals)]
+        t0 = time.perf_counter()
+        await asyncio.sleep(duration)
+        self._stop = True
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return time.perf_counter() - t0
+
+    def report(self, elapsed: float) -> dict:
+        out = {}
+        for name, st in sorted(self.stats.items()):
+            errors = sum(st.errors.values())
+            out[name] = {
+                "requests": st.count,
+                "rps": st.count / elapsed if elapsed else 0.0,
+                "p50_ms": st.percentile(50) * 1000,
+                "p95_ms": st.percentile(95) * 1000,
+                "p99_ms": st.percentile(99) * 1000,
+                "error_rate": errors / st.count if st.count else 0.0,
+                "errors": dict(st.errors),
+            }
+        return out
+
+
+def _print_report(report: dict, elapsed: float) -> None:
+    headers = ["Endpoint", "Req", "Req/s", "p50 ms", "p95 ms", "p99 ms", "Chyby"]
+    rows = [[name, r["requests"], f"{r['rps']:.1f}", f"{r['p50_ms']:.1f}", f"{r['p95_ms']:.1f}",
+             f"{r['p99_ms']:.1f}", f"{r['error_rate'] * 100:.1f}% {r['errors'] or ''}"]
+            for name, r in report.items()]
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    print(f"Doba běhu: {elapsed:.1f} s")
+    print(" | ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("-+-".join("-" * w for w in widths))
+    for r in rows:
+        print(" | ".join(str(c).ljust(w) for c, w in zip(r, widths)))
+
+
+def main(argv=None) -> int:
+    import config
+
+    p = argparse.ArgumentParser(description="Simulate displays and terminals against a time server")
+    p.add_argument("--base-url", default=getattr(config, "DEVICE_URL", DEVICE_URL),
+                   help="Server as the devices see it (default config.DEVICE_URL, plain HTTP on port 5000)")
+    p.add_argument("--displays", type=int, default=5, help="Number of simulated flip-dot displays")
+    p.add_argument("--terminals", type=int, default=5, help="Number of simulated time terminals")
+    p.add_argument("--display-names", default="buse5p", help="Comma separated display names to poll")
+    p.add_argument("--poll-interval", type=float, default=0.5, help="Display POLL_INTERVAL (seconds)")
+    p.add_argument("--think", type=float, nargs=2, default=(2.0, 8.0), metavar=("MIN", "MAX"),
+                   help="Terminal pause between actions (seconds)")
+    p.add_argument("--duration", type=float, default=30.0, help="Test length (seconds)")
+    p.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout (seconds)")
+    p.add_argument("--coin-tags", default=getattr(config, "LOADGEN_COIN_TAGS", None), metavar="FILE",
+                   help="File with coin tags for add_coinval, one per line (default config.LOADGEN_COIN_TAGS)")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = p.parse_args(argv)
+
+    gen = LoadGenerator(args.base_url, args.displays, args.terminals,
+                        args.display_names.split(","), args.poll_interval,
+                        tuple(args.think), args.timeout, args.coin_tags)
+    elapsed = asyncio.run(gen.run(args.duration))
+    report = gen.report(elapsed)
+    if args.json:
+        print(json.dumps({"elapsed": elapsed, "endpoints": report}, indent=2))
+    else:
+        _print_report(report, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
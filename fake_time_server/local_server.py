@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Self-contained stand-in for the Rock Pi time server (tabor2025 repo).
+# Implements the endpoints used by TimeServerAPI, the terminals and the
+# flip-dot displays, backed by in-memory data, with optional artificial
+# latency so client performance can be measured offline.
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Frame rendering is shared with the display editors
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "displays", "display_tool"))
+from flipdot import Canvas, DISP_H, DISP_W_UNIT
+
+
+class TimeStore:
+    """In-memory users, categories, coins and logs with ID/tag indexes."""
+
+    def __init__(self, num_users: int = 60, num_coins: int = 200, seed: int = 2025):
+        rnd = random.Random(seed)
+        now = datetime.now().replace(microsecond=0)
+        self.lock = threading.Lock()
+        self.active = True
+        self.allocated_time = 7 * 86400
+        self.version = 0  # bumped on every mutation, used as ETag
+        self.users = {}            # id -> user dict
+        self.users_by_tag = {}     # tag -> user dict
+        self.coins_by_tag = {}     # tag -> coin dict
+        self.categories = {0: {"id": 0, "name": "Všichni", "members": None}}
+        self.logs = []
+        self.displays = {"buse5p": 5, "buse3p": 3, "buse1p": 1}
+
+        for cid, name in ((1, "Vlčata"), (2, "Skauti"), (3, "Roveři")):
+            self.categories[cid] = {"id": cid, "name": name, "members": set()}
+        for uid in range(1, num_users + 1):
+            user = {
+                "id": uid,
+                "tag": f"{rnd.getrandbits(32):08X}",
+                "name": f"Hráč {uid}",
+                "acro": f"H{uid}",
+                "offset": rnd.randint(3600, 3 * 86400),
+                "start": (now - timedelta(seconds=rnd.randint(0, 3600))).isoformat(),
+                "active": 1,
+            }
+            self.users[uid] = user
+            self.users_by_tag[user["tag"]] = user
+            self.categories[1 + uid % 3]["members"].add(uid)
+        for i in range(num_coins):
+            cat = self.categories[1 + i % 3]
+            coin = {"tag": f"{rnd.getrandbits(32):08X}", "value": rnd.choice((60, 300, 600, 1800)),
+                    "category": cat["name"], "active": 1}
+            self.coins_by_tag[coin["tag"]] = coin
+
+    # -- helpers, call with self.lock held --
+
+    def _remaining(self, user: dict) -> int:
+        elapsed = int((datetime.now() - datetime.fromisoformat(user["start"])).total_seconds())
+        return max(user["offset"] - max(elapsed, 0), 0)
+
+    def _log(self, user_id, change: int, note: str) -> None:
+        log_id = self.logs[-1][0] + 1 if self.logs else 1
+        self.logs.append([log_id, datetime.now().replace(microsecond=0).isoformat(), user_id, change, note])
+
+    def _add_time(self, user: dict, offset: int, note: str) -> None:
+        user["offset"] += offset
+        self._log(user["id"], offset, note)
+        self.version += 1
+
+    # -- endpoint implementations --
+
+    def show_times(self):
+        return [{"name": u["name"], "offset": u["offset"], "start": u["start"]} for u in self.users.values()]
+
+    def list_users(self):
+        return [[u["id"], u["tag"], u["name"], u["acro"], u["offset"], u["start"], u["active"]]
+                for u in self.users.values()]
+
+    def list_categories(self):
+        return [[c["id"], c["name"]] for c in self.categories.values()]
+
+    def get_logs(self, since_id: int = 0):
+        if since_id <= 0:
+            return list(self.logs)
+        # Log IDs are dense and ascending, so the position follows from the ID
+        first = self.logs[0][0] if self.logs else 1
+        return self.logs[max(since_id - first + 1, 0):]
+
+    def bulk_add_user_time(self, user_ids, offset: int) -> dict:
+        users = [self.users[int(i)] for i in user_ids if int(i) in self.users]
+        for u in users:
+            self._add_time(u, offset, "admin")
+        return {"ok": True, "updated": len(users)}
+
+    def bulk_add_user_time_category(self, cat_ids, offset: int) -> dict:
+        ids = set()
+        for cid in cat_ids:
+            cat = self.categories.get(int(cid))
+            if cat is None:
+                continue
+            ids |= set(self.users) if cat["members"] is None else cat["members"]
+        return self.bulk_add_user_time(sorted(ids), offset)
+
+    def search_tag(self, tag: str) -> dict:
+        user = self.users_by_tag.get(tag)
+        if user is not None:
+            return {"type": "user", "user_name": user["name"], "user_acro": user["acro"],
+                    "remaining_time": self._remaining(user)}
+        coin = self.coins_by_tag.get(tag)
+        if coin is not None:
+            return {"type": "coin", "coin_value": coin["value"],
+                    "coin_category_name": coin["category"], "active": coin["active"]}
+        return {"error": "Tag not found"}
+
+    def subtract_time(self, tag: str, seconds: int) -> dict:
+        user = self.users_by_tag.get(tag)
+        if user is None:
+            return {"error": "User not found"}
+        if self._remaining(user) < seconds:
+            return {"error": "Not enough time"}
+        self._add_time(user, -seconds, "terminal payment")
+        return {"user_time": self._remaining(user)}
+
+    def add_coinval(self, coin_tag: str, user_tag: str) -> dict:
+        user = self.users_by_tag.get(user_tag)
+        coin = self.coins_by_tag.get(coin_tag)
+        if user is None or coin is None:
+            return {"error": "Tag not found"}
+        if not coin["active"]:
+            return {"error": "Coin already used"}
+        coin["active"] = 0
+        self._add_time(user, coin["value"], f"coin {coin_tag}")
+        return {"user_time": self._remaining(user), "coin_value": coin["value"]}
+
+    def display_frame(self, name: str) -> bytes | None:
+        """Raw frame for a display in the layout drawFrame in
+        esp8266_buse_client.ino decodes: full-width rows, LSB-first bits.
+
+        Each panel shows the share of users still alive as a bar.
+        """
+        screens = self.displays.get(name)
+        if screens is None:
+            return None
+        alive = sum(1 for u in self.users.values() if self._remaining(u) > 0)
+        lit = (alive * DISP_W_UNIT) // max(len(self.users), 1)
+        canvas = Canvas(screens)
+        for screen in range(screens):
+            canvas.fill_rect(screen * DISP_W_UNIT, 0, lit, DISP_H)
+        return canvas.to_firmware_bytes()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "InTimeLocal/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _delay(self) -> None:
+        latency, jitter = self.server.latency, self.server.jitter
+        if latency or jitter:
+            time.sleep(max(latency + random.uniform(-jitter, jitter), 0))
+
+    def _send(self, status: int, body: bytes, ctype: str, etag: str | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        gzip_min = self.server.gzip_min
+        if gzip_min is not None and len(body) >= gzip_min and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = zlib.compress(body, 6, wbits=16 + zlib.MAX_WBITS)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, obj, status: int = 200, etag: str | None = None) -> None:
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", etag)
+
+    def _read_body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b""
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            raw = zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        ctype = self.headers.get("Content-Type", "")
+        if "application/json" in ctype:
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError:
+                return {}
+        return {k: v if len(v) > 1 else v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+
+    def do_GET(self):
+        self._delay()
+        parts = urlsplit(self.path)
+        path = parts.path.removeprefix("/api/").strip("/")
+        q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        store = self.server.store
+        with store.lock:
+            etag = f'"{store.version}"'
+            if path in ("display/show_times", "admin/list_users", "admin/list_categories",
+                        "misc/get_allocated_time", "misc/get_active"):
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"", "application/json", etag)
+            if path == "misc/get_active":
+                return self._json({"active": store.active}, etag=etag)
+            if path == "misc/get_logs":
+                return self._json(store.get_logs(int(q.get("since_id") or 0)))
+            if path == "misc/get_allocated_time":
+                return self._json({"allocated_time": store.allocated_time}, etag=etag)
+            if path == "display/show_times":
+                return self._json(store.show_times(), etag=etag)
+            if path == "admin/list_users":
+                return self._json(store.list_users(), etag=etag)
+            if path == "admin/list_categories":
+                return self._json(store.list_categories(), etag=etag)
+            if path.startswith("display/display_output/"):
+                frame = store.display_frame(path.rsplit("/", 1)[1])
+                if frame is None:
+                    return self._json({"error": "Unknown display"}, 404)
+                if q.get("format") == "base64":
+                    return self._send(200, base64.b64encode(frame), "text/plain")
+                return self._send(200, frame, "application/octet-stream")
+            try:
+                if path == "nodes/search_tags":
+                    return self._json(store.search_tag(q["tag_id"]))
+                if path == "nodes/subtract_time":
+                    return self._json(store.subtract_time(q["user_tag_id"], int(q["time_to_subtract"])))
+                if path == "nodes/add_coinval":
+                    return self._json(store.add_coinval(q["coin_tag_id"], q["user_tag_id"]))
+            except (KeyError, ValueError) as e:
+                return self._json({"error": f"Bad request: {e}"}, 400)
+        self._json({"error": "Not found"}, 404)
+
+    def do_POST(self):
+        self._delay()
+        path = urlsplit(self.path).path.removeprefix("/api/").strip("/")
+        data = self._read_body()
+        store = self.server.store
+        try:
+            with store.lock:
+                if path == "misc/set_active":
+                    store.active = str(data.get("state", "")).strip().lower() in ("true", "1")
+                    store.version += 1
+                    return self._json({"ok": True, "active": store.active})
+                if path == "admin/bulk_add_user_time":
+                    return self._json(store.bulk_add_user_time(data["user_ids"], int(data["time_offset"])))
+                if path == "admin/bulk_add_user_time_category":
+                    return self._json(store.bulk_add_user_time_category(data["ids"], int(data["time_offset"])))
+        except (KeyError, TypeError, ValueError) as e:
+            return self._json({"error": f"Bad request: {e}"}, 400)
+        self._json({"error": "Not found"}, 404)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 5000, store: TimeStore | None = None,
+                latency: float = 0.0, jitter: float = 0.0, verbose: bool = False,
+                gzip_min: int | None = 1024) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.store = store or TimeStore()
+    server.latency = latency
+    server.jitter = jitter
+    server.verbose = verbose
+    server.gzip_min = gzip_min  # gzip responses of at least this size, None = never
+    return server
+
+
+def start_in_thread(**kwargs) -> ThreadingHTTPServer:
+    """Start a server on a background thread (port 0 picks a free port)."""
+    kwargs.setdefault("port", 0)
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Local stand-in In-Time server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=5000)
+    p.add_argument("--users", type=int, default=60, help="Number of generated users")
+    p.add_argument("--coins", type=int, default=200, help="Number of generated coins")
+    p.add_argument("--latency", type=float, default=0.0, help="Added delay per request (seconds)")
+    p.add_argument("--jitter", type=float, default=0.0, help="Random +/- delay on top of --latency")
+    p.add_argument("--no-gzip", action="store_true", help="Never gzip responses")
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    p.add_argument("--dump-coins", metavar="FILE", help="Write the coin tags, one per line (for loadgen.py --coin-tags)")
+    args = p.parse_args(argv)
+
+    store = TimeStore(args.users, args.coins)
+    if args.dump_coins:
+        with open(args.dump_coins, "w", encoding="utf-8") as f:
+            f.writelines(tag + "\n" for tag in store.coins_by_tag)
+    server = make_server(args.host, args.port, store,
+                         args.latency, args.jitter, args.verbose, None if args.no_gzip else 1024)
+    print(f"Serving on http://{args.host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from collections import deque
+
+
+def _row_id(row) -> int | None:
+    # Log rows are [id, timestamp, user_id, change, note]
+    try:
+        return int(row[0] if isinstance(row, (list, tuple)) else row["id"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def store_path(path: str, base_url: str) -> str:
+    """Per-server variant of path, so logs of different servers never mix."""
+    key = hashlib.sha1(base_url.rstrip("/").encode("utf-8")).hexdigest()[:12]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{key}{ext}"
+
+
+class LogStore:
+    """Append-only local copy of the server transaction log (one JSON row per line)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._last_id = None
+
+    def last_id(self) -> int:
+        """Highest log ID stored so far, 0 for an empty store."""
+        if self._last_id is None:
+            self._last_id = 0
+            line = self._last_line()
+            if line:
+                try:
+                    self._last_id = _row_id(json.loads(line)) or 0
+                except ValueError:
+                    # Torn last write, fall back to a full scan
+                    for row in self.iter_rows():
+                        rid = _row_id(row)
+                        if rid is not None and rid > self._last_id:
+                            self._last_id = rid
+        return self._last_id
+
+    def last_row(self):
+        """The stored row with ID last_id(), None for an empty store."""
+        line = self._last_line()
+        try:
+            return json.loads(line) if line else None
+        except ValueError:
+            last = self.last_id()
+            for row in self.iter_rows():
+                if _row_id(row) == last:
+                    return row
+            return None
+
+    def _last_line(self) -> str:
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            chunk = b""
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step) + chunk
+                lines = chunk.rstrip(b"\n").split(b"\n")
+                if len(lines) > 1 or pos == 0:
+                    return lines[-1].decode("utf-8", errors="replace")
+        return ""
+
+    def diff(self, rows):
+        """(new rows in ID order, whether rows still contain our last row).
+
+        rows must include the row with ID last_id() (see since_id in
+        time_server._sync_logs). If it is missing or differs, the server log
+        was reset or rewritten and the store no longer describes it.
+        """
+        last = self.last_id()
+        anchor = self.last_row() if last else None
+        matched = not last
+        fresh = []
+        for r in rows:
+            rid = _row_id(r) or 0
+            if rid > last:
+                fresh.append(r)
+            elif last and rid == last:
+                matched = r == anchor
+        fresh.sort(key=lambda r: _row_id(r) or 0)
+        return fresh, matched
+
+    def reset(self) -> None:
+        """Forget everything stored, before a full resync."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._last_id = None
+
+    def append(self, rows) -> int:
+        if not rows:
+            return 0
+        self.last_id()
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n")
+                rid = _row_id(r)
+                if rid is not None and rid > self._last_id:
+                    self._last_id = rid
+        return len(rows)
+
+    def iter_rows(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def tail(self, n: int) -> list:
+        return list(deque(self.iter_rows(), maxlen=n))
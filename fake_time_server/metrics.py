@@ -0,0 +1,151 @@
+import json
+import socket
+import ssl
+import threading
+from urllib.error import HTTPError, URLError
+
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def error_class(exc: BaseException) -> str:
+    if isinstance(exc, HTTPError):
+        return "HTTPError"
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return "timeout"
+    if isinstance(exc, URLError):
+        if isinstance(exc.reason, (socket.timeout, TimeoutError)):
+            return "timeout"
+        if isinstance(exc.reason, ssl.SSLError):
+            return "SSLError"
+        return "URLError"
+    if isinstance(exc, ssl.SSLError):
+        return "SSLError"
+    return type(exc).__name__
+
+
+class _Series:
+    __slots__ = ("count", "errors", "bytes_sent", "bytes_received", "bytes_saved", "buckets", "total",
+                 "cache_hits")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.total = 0.0
+        self.cache_hits = 0
+
+
+class Metrics:
+    """Per endpoint/method request counters and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}  # (endpoint, method) -> _Series
+
+    def _get(self, endpoint: str, method: str) -> _Series:
+        key = (endpoint.strip("/"), method.upper())
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = _Series()
+        return s
+
+    def observe(self, endpoint: str, method: str, seconds: float, sent: int = 0,
+                received: int = 0, error: BaseException | None = None, saved: int = 0) -> None:
+        # sent/received are bytes on the wire, saved is what compression spared
+        with self._lock:
+            s = self._get(endpoint, method)
+            s.count += 1
+            s.bytes_sent += sent
+            s.bytes_received += received
+            s.bytes_saved += saved
+            s.total += seconds
+            i = 0
+            while i < len(BUCKETS) and seconds > BUCKETS[i]:
+                i += 1
+            s.buckets[i] += 1
+            if error is not None:
+                cls = error_class(error)
+                s.errors[cls] = s.errors.get(cls, 0) + 1
+
+    def cache_hit(self, endpoint: str, method: str = "GET") -> None:
+        with self._lock:
+            self._get(endpoint, method).cache_hits += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def to_dict(self) -> dict:
+        out = {}
+        with self._lock:
+            for (endpoint, method), s in sorted(self._series.items()):
+                out[f"{method} {endpoint}"] = {
+                    "requests": s.count,
+                    "errors": dict(s.errors),
+                    "cache_hits": s.cache_hits,
+                    "bytes_sent": s.bytes_sent,
+                    "bytes_received": s.bytes_received,
+                    "bytes_saved": s.bytes_saved,
+                    "latency_sum": s.total,
+                    "latency_avg": s.total / s.count if s.count else 0.0,
+                    "latency_buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], s.buckets)),
+                }
+        return out
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "intime_client") -> str:
+        lines = []
+
+        def head(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        with self._lock:
+            items = sorted(self._series.items())
+            head("requests_total", "counter", "Requests sent to the time server.")
+            for (ep, m), s in items:
+                lines.append(f'{prefix}_requests_total{{endpoint="{ep}",method="{m}"}} {s.count}')
+            head("errors_total", "counter", "Failed requests by error class.")
+            for (ep, m), s in items:
+                for cls, n in sorted(s.errors.items()):
+                    lines.append(f'{prefix}_errors_total{{endpoint="{ep}",method="{m}",class="{cls}"}} {n}')
+            head("cache_hits_total", "counter", "Responses served from the local cache.")
+            for (ep, m), s in items:
+                lines.append(f'{prefix}_cache_hits_total{{endpoint="{ep}",method="{m}"}} {s.cache_hits}')
+            head("bytes_sent_total", "counter", "Request body bytes sent.")
+            for (ep, m), s in items:
+                lines.append(f'{prefix}_bytes_sent_total{{endpoint="{ep}",method="{m}"}} {s.bytes_sent}')
+            head("bytes_received_total", "counter", "Response body bytes received.")
+            for (ep, m), s in items:
+                lines.append(f'{prefix}_bytes_received_total{{endpoint="{ep}",method="{m}"}} {s.bytes_received}')
+            head("bytes_saved_total", "counter", "Bytes spared by gzip/deflate transfer encoding.")
+            for (ep, m), s in items:
+                lines.append(f'{prefix}_bytes_saved_total{{endpoint="{ep}",method="{m}"}} {s.bytes_saved}')
+            head("request_duration_seconds", "histogram", "Request latency.")
+            for (ep, m), s in items:
+                labels = f'endpoint="{ep}",method="{m}"'
+                cumulative = 0
+                for le, n in zip([str(b) for b in BUCKETS] + ["+Inf"], s.buckets):
+                    cumulative += n
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {s.total}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {s.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_table(self) -> str:
+        rows = [["Endpoint", "Req", "Chyby", "Cache", "Odesláno B", "Přijato B", "Ušetřeno B", "Prům. ms"]]
+        for name, d in self.to_dict().items():
+            errors = ", ".join(f"{k}={v}" for k, v in d["errors"].items()) or "0"
+            rows.append([name, d["requests"], errors, d["cache_hits"], d["bytes_sent"],
+                         d["bytes_received"], d["bytes_saved"], f"{d['latency_avg'] * 1000:.1f}"])
+        widths = [max(len(str(r[i])) for r in rows) for i in range(len(rows[0]))]
+        out = [" | ".join(str(c).ljust(w) for c, w in zip(r, widths)) for r in rows]
+        out.insert(1, "-+-".join("-" * w for w in widths))
+        return "\n".join(out)
@@ -0,0 +1,92 @@
+import csv
+import json
+import sys
+
+
+FORMATS = ("table", "csv", "ndjson", "json")
+
+
+def info_stream(fmt: str):
+    # Status lines would corrupt machine-readable output on stdout
+    return sys.stdout if fmt == "table" else sys.stderr
+
+
+class RowWriter:
+    """Prints listing rows as a table, CSV, NDJSON or a JSON array.
+
+    Machine formats are written row by row. The table needs its column
+    widths first: by default every row is buffered until flush()/close(),
+    with `lookahead` only the first K rows are and later rows are printed
+    immediately (a longer cell then just pushes its row out of line).
+    """
+
+    def __init__(self, headers, fmt: str = "table", lookahead: int | None = None, out=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown output format: {fmt}")
+        self.headers = list(headers)
+        self.fmt = fmt
+        self.lookahead = lookahead
+        self.out = out if out is not None else sys.stdout
+        self.count = 0
+        self._pending = []  # table rows as str cells, until widths are known
+        self._widths = None
+        self._csv = None
+        self._started = False
+
+    def write(self, row) -> None:
+        self.count += 1
+        if self.fmt == "table":
+            cells = [str(row[i]) for i in range(len(self.headers))]
+            if self._widths is not None:
+                self._print_cells(cells)
+                return
+            self._pending.append(cells)
+            if self.lookahead is not None and len(self._pending) >= self.lookahead:
+                self.flush()
+        elif self.fmt == "csv":
+            if self._csv is None:
+                self._csv = csv.writer(self.out)
+                self._csv.writerow(self.headers)
+            self._csv.writerow(list(row)[:len(self.headers)])
+        else:
+            line = json.dumps(self._as_dict(row), ensure_ascii=False)
+            if self.fmt == "ndjson":
+                self.out.write(line + "\n")
+            else:
+                self.out.write(("[\n" if not self._started else ",\n") + line)
+                self._started = True
+
+    def writerows(self, rows) -> int:
+        for r in rows:
+            self.write(r)
+        return self.count
+
+    def _as_dict(self, row) -> dict:
+        return {h: row[i] for i, h in enumerate(self.headers)}
+
+    def _print_cells(self, cells) -> None:
+        self.out.write(" | ".join(c.ljust(w) for c, w in zip(cells, self._widths)) + "\n")
+
+    def flush(self) -> None:
+        """Print what is buffered; for tables this fixes the column widths."""
+        if self.fmt == "table" and self._widths is None:
+            self._widths = [len(str(h)) for h in self.headers]
+            for cells in self._pending:
+                for i, c in enumerate(cells):
+                    if len(c) > self._widths[i]:
+                        self._widths[i] = len(c)
+            self._print_cells([str(h) for h in self.headers])
+            self.out.write("-+-".join("-" * w for w in self._widths) + "\n")
+            for cells in self._pending:
+                self._print_cells(cells)
+            self._pending = []
+        elif self.fmt == "csv" and self._csv is None:
+            self._csv = csv.writer(self.out)
+            self._csv.writerow(self.headers)
+        self.out.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.fmt == "json":
+            self.out.write("\n]\n" if self._started else "[]\n")
+            self.out.flush()
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import time
+
+from timecalc import match_user_ids
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id     INTEGER PRIMARY KEY,
+    tag    TEXT,
+    name   TEXT,
+    acro   TEXT,
+    offset INTEGER,
+    start  TEXT,
+    active INTEGER
+);
+CREATE INDEX IF NOT EXISTS users_tag ON users(tag);
+CREATE INDEX IF NOT EXISTS users_name ON users(name);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id   INTEGER PRIMARY KEY,
+    name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_times (
+    user_id INTEGER PRIMARY KEY,
+    name    TEXT,
+    offset  INTEGER,
+    start   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Upserts only touch rows whose columns actually differ
+_UPSERT_USER = """
+INSERT INTO users (id, tag, name, acro, offset, start, active) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    tag = excluded.tag, name = excluded.name, acro = excluded.acro,
+    offset = excluded.offset, start = excluded.start, active = excluded.active
+WHERE (tag, name, acro, offset, start, active)
+    IS NOT (excluded.tag, excluded.name, excluded.acro, excluded.offset, excluded.start, excluded.active)
+"""
+
+_UPSERT_CATEGORY = """
+INSERT INTO categories (id, name) VALUES (?, ?)
+ON CONFLICT(id) DO UPDATE SET name = excluded.name
+WHERE name IS NOT excluded.name
+"""
+
+_UPSERT_TIME = """
+INSERT INTO user_times (user_id, name, offset, start) VALUES (?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, offset = excluded.offset, start = excluded.start
+WHERE (name, offset, start) IS NOT (excluded.name, excluded.offset, excluded.start)
+"""
+
+
+class Replica:
+    """Local SQLite mirror of users, categories and user times."""
+
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self._migrate()
+        self.db.executescript(_SCHEMA)
+        self.unmatched_times = 0  # show_times rows of the last sync without a user ID
+
+    def _migrate(self) -> None:
+        # user_times used to be keyed by name, which merged namesakes; the
+        # old rows cannot be given IDs, so they are dropped until the next --sync
+        cols = [r[1] for r in self.db.execute("PRAGMA table_info(user_times)")]
+        if cols and "user_id" not in cols:
+            with self.db:
+                self.db.execute("DROP TABLE user_times")
+                self.db.execute("DELETE FROM meta WHERE key = 'synced_at:user_times'")
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _sync_table(self, table: str, key: str, upsert: str, rows: list) -> int:
+        cur = self.db.cursor()
+        changed = 0
+        keys = []
+        for r in rows:
+            cur.execute(upsert, r)
+            changed += cur.rowcount
+            keys.append((r[0],))
+        # Rows that disappeared on the server
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS _seen (k PRIMARY KEY)")
+        cur.execute("DELETE FROM _seen")
+        cur.executemany("INSERT OR IGNORE INTO _seen (k) VALUES (?)", keys)
+        cur.execute(f"DELETE FROM {table} WHERE {key} NOT IN (SELECT k FROM _seen)")
+        changed += cur.rowcount
+        return changed
+
+    def _time_rows(self, user_times) -> list:
+        users = self.db.execute("SELECT id, tag, name, acro, offset, start, active FROM users ORDER BY id").fetchall()
+        rows = []
+        self.unmatched_times = 0
+        for uid, t in zip(match_user_ids(users, user_times), user_times):
+            if uid is None:
+                self.unmatched_times += 1
+                continue
+            rows.append((uid, t["name"], t["offset"], t["start"]))
+        return rows
+
+    def sync(self, users=None, categories=None, user_times=None) -> dict:
+        """Apply full server listings, returns changed row counts per table.
+
+        A listing passed as None (e.g. a failed request) is left untouched.
+        User times are keyed by the user ID they are matched to, so users
+        should be synced first (or together); rows matching no user are
+        skipped and counted in unmatched_times.
+        """
+        counts = {}
+        with self.db:
+            if users is not None:
+                rows = [tuple(u[:7]) for u in users]
+                counts["users"] = self._sync_table("users", "id", _UPSERT_USER, rows)
+            if categories is not None:
+                rows = [tuple(c[:2]) for c in categories]
+                counts["categories"] = self._sync_table("categories", "id", _UPSERT_CATEGORY, rows)
+            if user_times is not None:
+                rows = self._time_rows(user_times)
+                counts["user_times"] = self._sync_table("user_times", "user_id", _UPSERT_TIME, rows)
+            for name in counts:
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                (f"synced_at:{name}", str(time.time())))
+        return counts
+
+    def synced_at(self, table: str) -> float | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (f"synced_at:{table}",)).fetchone()
+        return float(row[0]) if row else None
+
+    def age(self, table: str) -> float | None:
+        ts = self.synced_at(table)
+        return None if ts is None else time.time() - ts
+
+    def find_user(self, user_id=None, tag=None, name=None):
+        if user_id is not None:
+            return self.db.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        if tag is not None:
+            return self.db.execute("SELECT * FROM users WHERE tag = ?", (tag,)).fetchone()
+        if name is not None:
+            return self.db.execute("SELECT * FROM users WHERE name = ?", (name,)).fetchone()
+        return None
+
+
+class ReplicaReader:
+    """Answers the read-only TimeServerAPI calls from a Replica.
+
+    Same return shapes as the API, so the cmd_* printers work unchanged;
+    stream=True yields rows straight from the SQLite cursor.
+    """
+
+    def __init__(self, replica: Replica):
+        self.replica = replica
+
+    def list_users(self, stream: bool = False):
+        if self.replica.synced_at("users") is None:
+            return False
+        rows = (list(r) for r in self.replica.db.execute(
+            "SELECT id, tag, name, acro, offset, start, active FROM users ORDER BY id"))
+        return rows if stream else list(rows)
+
+    def list_user_cat(self):
+        if self.replica.synced_at("categories") is None:
+            return False
+        return [list(r) for r in self.replica.db.execute("SELECT id, name FROM categories ORDER BY id")]
+
+    def list_user_times(self, stream: bool = False):
+        if self.replica.synced_at("user_times") is None:
+            return False
+        rows = ({"name": n, "offset": o, "start": s} for n, o, s in self.replica.db.execute(
+            "SELECT name, offset, start FROM user_times ORDER BY user_id"))
+        return rows if stream else list(rows)
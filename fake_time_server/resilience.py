@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+from urllib.error import HTTPError, URLError
+
+from transport import ConnectError
+
+
+# Gateway/overload answers worth retrying for idempotent requests
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """Request refused locally because the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Bounded exponential backoff with full jitter.
+
+    GETs are retried on any transport failure or a RETRY_STATUSES answer.
+    Other methods are retried only when the connection could not be
+    established (ConnectError), i.e. the server never saw the request.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, method: str, exc: BaseException, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        if isinstance(exc, ConnectError):
+            return True
+        if method != "GET":
+            return False
+        if isinstance(exc, HTTPError):
+            return exc.code in RETRY_STATUSES
+        return isinstance(exc, (URLError, TimeoutError, ConnectionError))
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """Fails fast after repeated server failures.
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, letting one probe through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    # 4xx means the server is up and answering, only 5xx/transport errors count
+    if isinstance(exc, HTTPError):
+        return exc.code >= 500
+    return True
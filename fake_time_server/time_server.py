@@ -5,11 +5,24 @@ import sys
 import os
 import json
 import argparse
+import asyncio
 import time
 from datetime import datetime
 import tempfile
 
 from api import TimeServerAPI
+from async_api import AsyncTimeServerAPI
+from batch import apply_groups, group_rows, read_batch, write_report
+from cache import ResponseCache
+from daemon import CommandServer, DaemonRunningError, socket_path
+from dashboard import ALL_USERS, CATEGORY_HEADERS, DASHBOARD_HEADERS, MEMBERSHIP_UNKNOWN, SORT_KEYS, Dashboard
+from logstore import LogStore, store_path
+from output import FORMATS, RowWriter, info_stream
+from replica import Replica, ReplicaReader
+from resilience import RetryPolicy
+from timecalc import USER_TIME_HEADERS, UserTimes, format_stats
+import tracing
+from watch import UserTimesWatch
 import config
 
 
@@ -22,6 +35,26 @@ USER = None
 def _state_file_path() -> str:
     return os.path.expanduser(getattr(config, "CLI_STATE_FILE", "/tmp/.intime_cli_state.json"))
 
+def _cache_file_path() -> str:
+    # Lives next to the state file unless configured explicitly
+    path = getattr(config, "CLI_CACHE_FILE", None)
+    if path:
+        return os.path.expanduser(path)
+    return os.path.join(os.path.dirname(_state_file_path()), ".intime_cli_cache.json")
+
+def _log_store_path(base_url: str) -> str:
+    # One store per server, a copy of another server's log would hide its rows
+    path = getattr(config, "CLI_LOG_STORE", None)
+    if path:
+        return store_path(os.path.expanduser(path), base_url)
+    return store_path(os.path.join(os.path.dirname(_state_file_path()), ".intime_cli_logs.ndjson"), base_url)
+
+def _replica_path() -> str:
+    path = getattr(config, "CLI_REPLICA_FILE", None)
+    if path:
+        return os.path.expanduser(path)
+    return os.path.join(os.path.dirname(_state_file_path()), ".intime_cli_replica.sqlite3")
+
 def _load_state() -> None:
     global CORE_MODE, AUTHORIZED_MODE, USER
     path = _state_file_path()
@@ -99,111 +132,236 @@ def _parse_bool(s: str) -> bool:
         return False
     raise argparse.ArgumentTypeError(f"Invalid boolean: {s}")
 
-def _print_table(headers, rows):
-    cols = len(headers)
-    widths = [len(str(h)) for h in headers]
-    for r in rows:
-        for i in range(cols):
-            widths[i] = max(widths[i], len(str(r[i])))
-    def fmt_row(row):
-        return " | ".join(str(row[i]).ljust(widths[i]) for i in range(cols))
-    sep = "-+-".join("-" * w for w in widths)
-    print(fmt_row(headers))
-    print(sep)
-    for r in rows:
-        print(fmt_row(r))
+@tracing.traced(cat="local")
+def _print_table(headers, rows, output: str = "table", lookahead: int | None = None):
+    writer = RowWriter(headers, output, lookahead)
+    writer.writerows(rows)
+    writer.close()
 
 
 # ---------------- Commands ----------------
 
+@tracing.traced
 def cmd_get_active(api: TimeServerAPI) -> int:
     print(api.get_system_active())
     return 0
 
-def cmd_list_user_times(api: TimeServerAPI) -> int:
-    print("Přijímám data...")
-    data = api.list_user_times()
+@tracing.traced
+def cmd_list_user_times(api: TimeServerAPI, watch: bool = False, sync_interval: float = 30.0,
+                        warn_below: int = 600, output: str = "table", lookahead: int | None = None,
+                        interval: float = 2.0) -> int:
+    if watch:
+        log_moved = None
+        if isinstance(api, TimeServerAPI):
+            # Every offset change is a log row: polling the log's high-water
+            # mark tells the watch when to re-sync before sync_interval
+            store = LogStore(_log_store_path(api.base_url))
+            log_moved = lambda: bool(_sync_logs(api, store))
+        return UserTimesWatch(api, sync_interval=sync_interval, warn_below=warn_below,
+                              log_moved=log_moved, log_interval=interval).run()
+    print("Přijímám data...", file=info_stream(output))
+    data = api.list_user_times(stream=True)
     if data is False:
         return 1
 
-    # Expecting: [{'name': str, 'offset': int, 'start': 'YYYY-MM-DDTHH:MM:SS'}, ...]
+    times = UserTimes(data)
     now = datetime.now()
-    rows = []
-    for item in data:
-        try:
-            name = item["name"]
-            offset = int(item["offset"])
-            start = datetime.fromisoformat(item["start"])
-            elapsed = int((now - start).total_seconds())
-            if elapsed < 0:
-                elapsed = 0
-            # remaining
-            total = offset - elapsed
-            if total < 0:
-                total = 0
-            fmt = TimeServerAPI.format_time(total)
-            if total == 0:
-                fmt = f"DEAD: {fmt}"
-            rows.append([
-                name,
-                item["start"],
-                offset,
-                elapsed,
-                total,
-                fmt,
-            ])
-        except Exception as e:
-            rows.append([str(item), "-", "-", "-", "-", f"ERR: {e}"])
-
-    headers = ["Jméno", "Start", "Offset(s)", "Uplynulo(s)", "Zbývá(s)", "Výsledný čas(fmt)"]
-    _print_table(headers, rows)
-    return 0
-
-def cmd_list_users(api: TimeServerAPI) -> int:
-    print("Přijímám data...")
-    data = api.list_users()
+    _print_table(USER_TIME_HEADERS, times.rows(now), output, lookahead)
+    print(format_stats(times.stats(now)), file=info_stream(output))
+    return 1 if getattr(data, "failed", False) else 0
+
+@tracing.traced
+def cmd_list_users(api: TimeServerAPI, output: str = "table", lookahead: int | None = None) -> int:
+    print("Přijímám data...", file=info_stream(output))
+    data = api.list_users(stream=True)
     if data is False:
         return 1
     # Structure: [[id, tag, name, acro, offset, start, active], ...]
     headers = ["ID", "Tag", "Jméno", "Acr", "Offset(s)", "Start", "Aktivní"]
-    _print_table(headers, data)
-    return 0
+    _print_table(headers, data, output, lookahead)
+    return 1 if getattr(data, "failed", False) else 0
 
-def cmd_list_categories(api: TimeServerAPI) -> int:
-    print("Přijímám data...")
+@tracing.traced
+def cmd_list_categories(api: TimeServerAPI, output: str = "table", lookahead: int | None = None) -> int:
+    print("Přijímám data...", file=info_stream(output))
     data = api.list_user_cat()
     if data is False:
         return 1
     headers = ["ID", "Jméno"]
-    _print_table(headers, data)
+    _print_table(headers, data, output, lookahead)
     return 0
 
-def cmd_get_logs(api: TimeServerAPI) -> int:
-    print("Přijímám data...")
-    data = api.list_logs()
-    if data is False:
+@tracing.traced
+def cmd_dashboard(api: TimeServerAPI, category: str | None = None, below: int | None = None,
+                  sort: str = "remaining", output: str = "table", lookahead: int | None = None) -> int:
+    print("Přijímám data...", file=info_stream(output))
+    if isinstance(api, TimeServerAPI):
+        # One concurrent round-trip instead of three sequential ones
+        users, times, cats = asyncio.run(AsyncTimeServerAPI(api).gather(
+            ("list_users",), ("list_user_times",), ("list_user_cat",)))
+    else:
+        # The offline replica's SQLite handle is bound to this thread
+        users, times, cats = api.list_users(), api.list_user_times(), api.list_user_cat()
+    if not all(isinstance(x, list) for x in (users, times, cats)):
         return 1
-    headers = ["ID", "Časové razítko", "UserID", "Změna", "Poznámka"]
-    _print_table(headers, data)
+
+    board = Dashboard(users, times, cats)
+    cat_id = None
+    if category is not None:
+        cat_id = board.category_id(category)
+        if cat_id is None:
+            print(f"Neznámá kategorie: {category}")
+            return 1
+        if cat_id != ALL_USERS:
+            print(MEMBERSHIP_UNKNOWN)
+            return 2
+
+    fmt = TimeServerAPI.format_time
+    cat_rows = [[cid, name, n, dead, fmt(total), fmt(mean)]
+                for cid, name, n, dead, total, mean in board.category_stats()]
+    if output == "table":
+        _print_table(CATEGORY_HEADERS, cat_rows)
+        print()
+    _print_table(DASHBOARD_HEADERS, board.user_rows(cat_id, below, sort), output, lookahead)
     return 0
 
+def _sync_logs(api: TimeServerAPI, store: LogStore, full: bool = False):
+    # Ask for our last row and everything newer; diff client-side in case
+    # the server ignored since_id and sent the whole log
+    last = 0 if full else store.last_id()
+    data = api.list_logs(since_id=last - 1 if last > 1 else None, stream=True)
+    if data is False:
+        return False
+    # Only rows newer than the store are kept while the stream is consumed
+    rows, matched = store.diff(data)
+    if getattr(data, "failed", False):
+        return False  # a partial page could leave a gap below the new last_id
+    if not matched:
+        # Our last row is gone or different: the server was reset
+        print("Log na serveru nenavazuje na lokální kopii, stahuji ho znovu celý.", file=sys.stderr)
+        store.reset()
+        return _sync_logs(api, store, full=True)
+    store.append(rows)
+    return rows
+
+@tracing.traced
+def cmd_get_logs(api: TimeServerAPI, tail: int | None = None, follow: bool = False,
+                 interval: float = 2.0, output: str = "table", lookahead: int | None = None) -> int:
+    print("Přijímám data...", file=info_stream(output))
+    store = LogStore(_log_store_path(api.base_url))
+    if _sync_logs(api, store) is False:
+        return 1
+    headers = ["ID", "Časové razítko", "UserID", "Změna", "Poznámka"]
+    writer = RowWriter(headers, output, lookahead)
+    writer.writerows(store.tail(tail) if tail else store.iter_rows())
+    if not follow:
+        writer.close()
+        return 0
+    # Column widths are fixed by the first table, new rows are printed as they come
+    writer.flush()
+    try:
+        while True:
+            time.sleep(interval)
+            new = _sync_logs(api, store)
+            for r in new or ():
+                writer.write(r)
+            writer.flush()
+    except KeyboardInterrupt:
+        writer.close()
+        return 0
+
+@tracing.traced
 def cmd_get_allocated_time(api: TimeServerAPI) -> int:
     print("Přijímám data...")
     print("Celkový dostupný čas je:", api.get_time_allocation(), "vteřin")
     return 0
 
+@tracing.traced
+def cmd_sync(api: TimeServerAPI) -> int:
+    print("Synchronizuji lokální repliku...")
+    if api.cache is not None:
+        # The replica is stamped with the sync time, so it must not get
+        # cached responses that are already up to a TTL old
+        api.cache.invalidate(("admin/list_users", "admin/list_categories", "display/show_times"))
+    users, cats, times = asyncio.run(AsyncTimeServerAPI(api).gather(
+        ("list_users",), ("list_user_cat",), ("list_user_times",)))
+    replica = Replica(_replica_path())
+    try:
+        counts = replica.sync(
+            users=users if isinstance(users, list) else None,
+            categories=cats if isinstance(cats, list) else None,
+            user_times=times if isinstance(times, list) else None,
+        )
+    finally:
+        replica.close()
+    for table in ("users", "categories", "user_times"):
+        print(f"{table}: " + (f"{counts[table]} změněných řádků" if table in counts else "selhalo"))
+    if replica.unmatched_times:
+        print(f"user_times: {replica.unmatched_times} řádků bez odpovídajícího uživatele vynecháno")
+    return 0 if len(counts) == 3 and not replica.unmatched_times else 1
+
+# Replica tables each read command needs with --offline
+_OFFLINE_TABLES = {
+    "list_user_times": ("user_times",),
+    "list_users": ("users",),
+    "list_categories": ("categories",),
+    "dashboard": ("users", "user_times", "categories"),
+}
+
+def _offline_reader(tables, output: str = "table"):
+    """ReplicaReader for --offline, or None (error printed) if it has no data."""
+    path = _replica_path()
+    if not os.path.exists(path):
+        print("Lokální replika neexistuje, nejdřív spusťte --sync.", file=info_stream(output))
+        return None
+    replica = Replica(path)
+    ages = [replica.age(t) for t in tables]
+    if None in ages:
+        replica.close()
+        print("Lokální replika není synchronizována, spusťte --sync.", file=info_stream(output))
+        return None
+    print(f"Offline data z lokální repliky (stáří {TimeServerAPI.format_time(max(ages))})", file=info_stream(output))
+    return ReplicaReader(replica)
+
+@tracing.traced
 def cmd_apply_user_offset(api: TimeServerAPI, user_id: int, offset: int) -> int:
     print("Upravuji offsety uživatelů...")
     ok = api.apply_offset_user(user_id, offset)
     print("Operace byla úspěšná" if ok else "Operace selhala")
     return 0 if ok else 1
 
+@tracing.traced
 def cmd_apply_user_cat(api: TimeServerAPI, cat_id: int, offset: int) -> int:
     print("Upravuji offset kategorie...")
     ok = api.apply_offset_cat(cat_id, offset)
     print("Operace byla úspěšná" if ok else "Operace selhala")
     return 0 if ok else 1
 
+@tracing.traced
+def cmd_apply_batch(api: TimeServerAPI, path: str, report: str | None = None,
+                    max_concurrency: int = 4) -> int:
+    try:
+        rows = read_batch(path)
+    except (OSError, ValueError) as e:
+        print("Nelze načíst soubor:", e)
+        return 1
+    groups = group_rows(rows)
+    print(f"Upravuji offsety: {len(rows)} řádků v {len(groups)} požadavcích...")
+    asyncio.run(apply_groups(AsyncTimeServerAPI(api, max_concurrency=max_concurrency), groups))
+    report = report or path + ".report.csv"
+    failed = [r for r in rows if not r.get("ok")]
+    try:
+        write_report(report, rows)
+    except OSError as e:
+        # The offsets are applied already, so the outcome is still printed
+        print("Nelze zapsat report:", e)
+        report = None
+    print(f"Úspěšně: {len(rows) - len(failed)}, selhalo: {len(failed)}" + (f", report: {report}" if report else ""))
+    for r in failed:
+        print(f"  řádek {r['line']}: {r['error']}")
+    return 0 if not failed and report else 1
+
+@tracing.traced
 def cmd_set_core_mode(api: TimeServerAPI) -> int:
     global CORE_MODE
     print("CORE MODE vám umožní povolit úpravy, které nejsou za běžných podmínek dostupné. Nesprávné zacházení může způsobit újmu na technickém vybavení i životech obyvatel! Používejte s rozvahou.")
@@ -223,6 +381,7 @@ def cmd_set_core_mode(api: TimeServerAPI) -> int:
     print("Mód CORE_MODE povolen, jednáte v rizikové zóně!")
     return 0
 
+@tracing.traced
 def cmd_authorize() -> int:
     global AUTHORIZED_MODE
     print("Autorizací se dostanete do kritických částí systému, na kterých závisí samotné životy občanů (včetně Vás). Jednejte s maximální opatrností a rozvahou! Změny jsou absolutně nevratné!")
@@ -246,6 +405,7 @@ def cmd_authorize() -> int:
     print("Mód AUTHORIZED_MODE povolen, jednáte v kritické zóně!")
     return 0
 
+@tracing.traced
 def cmd_set_user(api: TimeServerAPI, name: str) -> int:
     global USER
     print("Zadáním jména se přibližujete restriktivní zóně In-Time serveru. Opravdu si přejete pokračovat, i když každá změna může být fatální?")
@@ -267,6 +427,7 @@ def cmd_set_user(api: TimeServerAPI, name: str) -> int:
     print("Uživatel uložen!")
     return 0
 
+@tracing.traced
 def cmd_set_active(api: TimeServerAPI, state: bool) -> int:
     if not AUTHORIZED_MODE:
         print("Pro vykonání této operace potřebujete vyšší oprávnění!")
@@ -307,6 +468,7 @@ def cmd_set_active(api: TimeServerAPI, state: bool) -> int:
 
     return 0 if ok else 1
 
+@tracing.traced
 def cmd_split_allocated_time(api: TimeServerAPI) -> int:
     if not AUTHORIZED_MODE:
         print("Pro vykonání této operace potřebujete vyšší oprávnění!")
@@ -314,11 +476,83 @@ def cmd_split_allocated_time(api: TimeServerAPI) -> int:
     if not _yes_no("Rozdělit dostupný čas rovnoměrně mezi uživatele?"):
         print("Zrušeno uživatelem.")
         return 2
-    ok = api.split_allocated_evenly()
+    # User list and allocation are fetched concurrently
+    ok = asyncio.run(AsyncTimeServerAPI(api).split_allocated_evenly())
     print("Operace byla úspěšná" if ok else "Operace selhala")
     return 0 if ok else 1
 
 
+def _dump_stats(api: TimeServerAPI, args) -> None:
+    if not args.stats:
+        return
+    if args.stats == "prometheus":
+        text = api.metrics.to_prometheus()
+    elif args.stats == "json":
+        text = api.metrics.to_json() + "\n"
+    else:
+        text = api.metrics.to_table() + "\n"
+    if args.stats_file:
+        with open(args.stats_file, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text, end="")
+
+# Options that configure the API client. The daemon builds its client once
+# at startup, so per-command values would be silently ignored.
+_DAEMON_FIXED_OPTIONS = ("base_url", "verify_ssl", "timeout", "retries", "pool_size", "idle_timeout",
+                         "coalesce_window", "gzip_min_size", "no_cache", "trace")
+# Commands that run until interrupted would block the one-at-a-time daemon
+# after their client is gone, since nothing reads the socket meanwhile
+_DAEMON_UNBOUNDED_OPTIONS = ("follow", "watch")
+# File arguments the daemon opens; client.py makes them absolute
+_DAEMON_PATH_OPTIONS = ("apply_batch", "report", "stats_file")
+_UNSET = object()
+
+def cmd_daemon(api: TimeServerAPI, path: str | None = None) -> int:
+    path = path or socket_path()
+    parser = build_parser()
+    parser.set_defaults(**{name: _UNSET for name in _DAEMON_FIXED_OPTIONS})
+
+    def run(argv) -> int:
+        args = parser.parse_args(argv)
+        if args.daemon:
+            print("Démon už běží.")
+            return 2
+        fixed = ["--" + n.replace("_", "-") for n in _DAEMON_FIXED_OPTIONS if getattr(args, n) is not _UNSET]
+        if fixed:
+            print(f"Volby {', '.join(fixed)} platí pro celý démon, zadejte je při jeho spuštění (--daemon).")
+            return 2
+        unbounded = ["--" + n for n in _DAEMON_UNBOUNDED_OPTIONS if getattr(args, n)]
+        if unbounded:
+            print(f"{', '.join(unbounded)} přes démona nejde, spusťte time_server.py přímo.")
+            return 2
+        relative = [getattr(args, n) for n in _DAEMON_PATH_OPTIONS
+                    if getattr(args, n) and not os.path.isabs(getattr(args, n))]
+        if relative:
+            print(f"Démon nezná pracovní adresář klienta, použijte absolutní cestu: {', '.join(relative)}")
+            return 2
+        try:
+            return run_command(api, args)
+        finally:
+            if api.cache is not None:
+                api.cache.save()
+            _dump_stats(api, args)
+
+    try:
+        server = CommandServer(path, run)
+    except (DaemonRunningError, FileExistsError) as e:
+        print(f"Démon nelze spustit: {e}")
+        return 2
+    print(f"Démon naslouchá na {path} (Ctrl+C ukončí)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
 # ---------------- Argparse ----------------
 
 def build_parser() -> argparse.ArgumentParser:
@@ -332,22 +566,57 @@ def build_parser() -> argparse.ArgumentParser:
     mx.add_argument("--list_user_times", action="store_true", help="Print computed user times table")
     mx.add_argument("--list_users", action="store_true", help="Print users table")
     mx.add_argument("--list_categories", action="store_true", help="Print categories table")
+    mx.add_argument("--dashboard", action="store_true", help="Users and their remaining times joined into one report")
     mx.add_argument("--get_logs", action="store_true", help="Print logs table")
     mx.add_argument("--get_allocated_time", action="store_true", help="Print allocated time")
 
+    mx.add_argument("--sync", action="store_true", help="Mirror users, categories and times into the local replica")
+
     mx.add_argument("--apply_user_offset", nargs=2, metavar=("USER_ID", "OFFSET"), help="Apply offset to user")
     mx.add_argument("--apply_user_cat", nargs=2, metavar=("CAT_ID", "OFFSET"), help="Apply offset to category")
+    mx.add_argument("--apply_batch", metavar="FILE", help="Apply offsets from a CSV, JSON array or JSONL file (user_id|category_id, offset)")
 
     mx.add_argument("--set_core_mode", action="store_true", help="Set CORE_MODE=True (persisted)")
     mx.add_argument("--authorize", action="store_true", help="Set AUTHORIZED_MODE=True (persisted)")
     mx.add_argument("--set_user", metavar="USER_NAME", help="Set USER variable (persisted)")
 
+    mx.add_argument("--daemon", action="store_true", help="Serve commands from client.py over a Unix socket")
+
     mx.add_argument("--set_active", metavar="BOOL", help="Confirm, then call set_active(True/False)")
     mx.add_argument("--split_allocated_time", action="store_true", help="Confirm, then split allocated time evenly")
 
+    p.add_argument("--output", choices=FORMATS, default="table", help="Format of list commands")
+    p.add_argument("--lookahead", type=int, default=None, metavar="K",
+                   help="With --output table: size columns from the first K rows and print as rows arrive")
+    p.add_argument("--offline", action="store_true", help="Answer list commands from the local replica (see --sync)")
+    p.add_argument("--category", default=None,
+                   help="With --dashboard: category ID or name (only 0, the API has no membership)")
+    p.add_argument("--below", type=int, default=None, metavar="SEC",
+                   help="With --dashboard: only users with less than SEC seconds left")
+    p.add_argument("--sort", choices=SORT_KEYS, default="remaining", help="With --dashboard: row order")
+    p.add_argument("--watch", action="store_true", help="With --list_user_times: live countdown dashboard")
+    p.add_argument("--sync-interval", type=float, default=30.0, help="Re-fetch interval for --watch (seconds)")
+    p.add_argument("--warn-below", type=int, default=600, help="Highlight users with less remaining seconds")
+    p.add_argument("--report", default=None, metavar="FILE", help="With --apply_batch: per-row result CSV")
+    p.add_argument("--max-concurrency", type=int, default=4, help="Max requests in flight for --apply_batch")
+    p.add_argument("--tail", type=int, default=None, metavar="N", help="With --get_logs: print only the last N rows")
+    p.add_argument("--follow", action="store_true", help="With --get_logs: keep printing new transactions")
+    p.add_argument("--interval", type=float, default=2.0, help="Log polling interval for --follow and --watch (seconds)")
+    p.add_argument("--socket", default=None, help="Unix socket of --daemon (default config.CLI_SOCKET)")
     p.add_argument("--verify-ssl", action="store_true", help="Verify TLS certs (if base URL is https)")
     p.add_argument("--timeout", type=int, default=6, help="HTTP timeout (seconds)")
     p.add_argument("--base-url", default=None, help="Override config.TIMESERVER_URL")
+    p.add_argument("--retries", type=int, default=3, help="Max attempts per request (1 disables retries)")
+    p.add_argument("--pool-size", type=int, default=None, help="Max idle keep-alive connections per host")
+    p.add_argument("--idle-timeout", type=float, default=None, help="Drop idle connections after N seconds")
+    p.add_argument("--stats", nargs="?", const="table", choices=("table", "prometheus", "json"),
+                   help="After the command print request metrics (cumulative in --daemon)")
+    p.add_argument("--stats-file", default=None, help="Write --stats output to this file instead")
+    p.add_argument("--trace", default=None, metavar="FILE", help="Write a Chrome trace (Perfetto) of the command")
+    p.add_argument("--coalesce-window", type=float, default=None, metavar="SEC", help="Merge offset changes issued within SEC seconds")
+    p.add_argument("--gzip-min-size", type=int, default=None, metavar="BYTES",
+                   help="Gzip request bodies of at least BYTES (server must accept Content-Encoding)")
+    p.add_argument("--no-cache", action="store_true", help="Always fetch fresh data, bypass the response cache")
 
     return p
 
@@ -356,22 +625,59 @@ def main(argv=None) -> int:
     _load_state()  # restore persisted CORE_MODE/AUTHORIZED_MODE/USER
 
     args = build_parser().parse_args(argv)
-    api = TimeServerAPI(base_url=args.base_url, verify_ssl=args.verify_ssl, timeout=args.timeout)
+    if args.trace:
+        tracing.enable()
+    # With --no-cache nothing is cached, but mutations still invalidate the file
+    cache = ResponseCache(_cache_file_path(), ttls={} if args.no_cache else None)
+    api = TimeServerAPI(base_url=args.base_url, verify_ssl=args.verify_ssl, timeout=args.timeout,
+                        pool_size=args.pool_size, idle_timeout=args.idle_timeout, cache=cache,
+                        coalesce_window=args.coalesce_window, retry=RetryPolicy(args.retries),
+                        gzip_min_size=args.gzip_min_size)
+    try:
+        if args.daemon:
+            return cmd_daemon(api, args.socket)
+        code = run_command(api, args)
+        _dump_stats(api, args)
+        return code
+    finally:
+        api.close()  # also persists the response cache
+        if args.trace:
+            tracing.active().write(args.trace)
+
+
+def run_command(api: TimeServerAPI, args) -> int:
+    source = api  # what the read commands below read from
+    if args.offline:
+        tables = next((t for name, t in _OFFLINE_TABLES.items() if getattr(args, name)), None)
+        if tables is not None:
+            source = _offline_reader(tables, args.output)
+            if source is None:
+                return 1
 
     if args.get_active:
         return cmd_get_active(api)
 
     if args.list_user_times:
-        return cmd_list_user_times(api)
+        return cmd_list_user_times(source, watch=args.watch, sync_interval=args.sync_interval,
+                                   warn_below=args.warn_below, output=args.output,
+                                   lookahead=args.lookahead, interval=args.interval)
 
     if args.list_users:
-        return cmd_list_users(api)
+        return cmd_list_users(source, args.output, args.lookahead)
 
     if args.list_categories:
-        return cmd_list_categories(api)
+        return cmd_list_categories(source, args.output, args.lookahead)
+
+    if args.dashboard:
+        return cmd_dashboard(source, category=args.category, below=args.below, sort=args.sort,
+                             output=args.output, lookahead=args.lookahead)
+
+    if args.sync:
+        return cmd_sync(api)
 
     if args.get_logs:
-        return cmd_get_logs(api)
+        return cmd_get_logs(api, tail=args.tail, follow=args.follow, interval=args.interval,
+                            output=args.output, lookahead=args.lookahead)
 
     if args.get_allocated_time:
         return cmd_get_allocated_time(api)
@@ -384,6 +690,9 @@ def main(argv=None) -> int:
         cid, off = args.apply_user_cat
         return cmd_apply_user_cat(api, int(cid), int(off))
 
+    if args.apply_batch:
+        return cmd_apply_batch(api, args.apply_batch, args.report, args.max_concurrency)
+
     if args.set_core_mode:
         return cmd_set_core_mode(api)
 
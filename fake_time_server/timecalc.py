@@ -0,0 +1,157 @@
+from array import array
+from datetime import datetime
+
+from api import TimeServerAPI
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+
+USER_TIME_HEADERS = ["Jméno", "Start", "Offset(s)", "Uplynulo(s)", "Zbývá(s)", "Výsledný čas(fmt)"]
+
+
+def _format_times(remaining) -> list:
+    # Same output as TimeServerAPI.format_time, split into columns first
+    if np is not None:
+        r = np.asarray(remaining, dtype=np.int64)
+        days, rest = np.divmod(r, 86400)
+        hours, rest = np.divmod(rest, 3600)
+        mins, secs = np.divmod(rest, 60)
+        cols = zip(days.tolist(), hours.tolist(), mins.tolist(), secs.tolist())
+    else:
+        cols = ((s // 86400, s % 86400 // 3600, s % 3600 // 60, s % 60) for s in remaining)
+    return [f"{d}:{h:02d}:{m:02d}:{s:02d}" for d, h, m, s in cols]
+
+
+def _percentile(sorted_vals, q: float) -> float:
+    # Linear interpolation, matches numpy.percentile's default
+    if not sorted_vals:
+        return 0.0
+    pos = (len(sorted_vals) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+
+
+class UserTimes:
+    """Column-wise view of a display/show_times payload.
+
+    Start times are parsed once; remaining times for any `now` are then
+    computed in one pass over the columns (NumPy when installed).
+    """
+
+    def __init__(self, data):
+        # Expecting: [{'name': str, 'offset': int, 'start': 'YYYY-MM-DDTHH:MM:SS'}, ...]
+        self.items = list(data)
+        self.index = []      # payload position of each valid row
+        self.names = []
+        self.starts = []
+        self.errors = {}     # payload position -> error message
+        epochs = []
+        offsets = []
+        for pos, item in enumerate(self.items):
+            try:
+                name = item["name"]
+                offset = int(item["offset"])
+                epoch = datetime.fromisoformat(item["start"]).timestamp()
+            except Exception as e:
+                self.errors[pos] = str(e)
+                continue
+            self.index.append(pos)
+            self.names.append(name)
+            self.starts.append(item["start"])
+            offsets.append(offset)
+            epochs.append(epoch)
+        if np is not None:
+            self.epochs = np.array(epochs, dtype=np.float64)
+            self.offsets = np.array(offsets, dtype=np.int64)
+        else:
+            self.epochs = array("d", epochs)
+            self.offsets = array("q", offsets)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def compute(self, now: datetime | None = None) -> dict:
+        """Elapsed/remaining seconds and dead mask of the valid rows."""
+        now_ts = (now or datetime.now()).timestamp()
+        if np is not None:
+            elapsed = np.maximum(np.floor(now_ts - self.epochs), 0).astype(np.int64)
+            remaining = np.maximum(self.offsets - elapsed, 0)
+            return {"elapsed": elapsed, "remaining": remaining, "dead": remaining == 0}
+        elapsed = array("q", (max(int(now_ts - e), 0) for e in self.epochs))
+        remaining = array("q", (max(o - el, 0) for o, el in zip(self.offsets, elapsed)))
+        return {"elapsed": elapsed, "remaining": remaining, "dead": [r == 0 for r in remaining]}
+
+    def rows(self, now: datetime | None = None) -> list:
+        """Rows of USER_TIME_HEADERS in payload order."""
+        cols = self.compute(now)
+        elapsed = cols["elapsed"].tolist()
+        remaining = cols["remaining"].tolist()
+        fmts = _format_times(remaining)
+        rows = [None] * len(self.items)
+        for i, pos in enumerate(self.index):
+            fmt = fmts[i]
+            if remaining[i] == 0:
+                fmt = f"DEAD: {fmt}"
+            rows[pos] = [self.names[i], self.starts[i], int(self.offsets[i]), elapsed[i], remaining[i], fmt]
+        for pos, err in self.errors.items():
+            rows[pos] = [str(self.items[pos]), "-", "-", "-", "-", f"ERR: {err}"]
+        return rows
+
+    def stats(self, now: datetime | None = None, percentiles=(50, 90, 99)) -> dict:
+        """Aggregates over remaining time of the valid rows."""
+        cols = self.compute(now)
+        remaining = cols["remaining"]
+        out = {"users": len(self.index), "errors": len(self.errors)}
+        if np is not None:
+            out["total_remaining"] = int(remaining.sum())
+            out["dead"] = int(cols["dead"].sum())
+            values = np.percentile(remaining, percentiles).tolist() if len(remaining) else [0.0] * len(percentiles)
+        else:
+            out["total_remaining"] = sum(remaining)
+            out["dead"] = sum(cols["dead"])
+            ordered = sorted(remaining)
+            values = [_percentile(ordered, q) for q in percentiles]
+        for q, v in zip(percentiles, values):
+            out[f"p{q}"] = float(v)
+        return out
+
+
+def format_stats(stats: dict) -> str:
+    fmt = TimeServerAPI.format_time
+    return (f"Uživatelů: {stats['users']}, mrtvých: {stats['dead']}, "
+            f"celkem zbývá: {fmt(stats['total_remaining'])}, "
+            f"medián: {fmt(stats['p50'])}, p90: {fmt(stats['p90'])}")
+
+
+def match_user_ids(users, times) -> list:
+    """User ID of each display/show_times row, None where no user matches.
+
+    show_times rows carry no ID. They are matched to admin/list_users rows
+    ([id, tag, name, acro, offset, start, active]) by (name, offset, start),
+    then by name alone in case the offset changed between the two requests.
+    Every user is matched at most once, so namesakes stay apart.
+    """
+    by_row, by_name = {}, {}
+    for u in users:
+        by_row.setdefault((u[2], u[4], u[5]), []).append(u[0])
+        by_name.setdefault(u[2], []).append(u[0])
+    used = set()
+    out = []
+    for t in times:
+        key = (t.get("name"), t.get("offset"), t.get("start")) if isinstance(t, dict) else (None, None, None)
+        uid = next((u for u in by_row.get(key, ()) if u not in used), None)
+        if uid is None:
+            uid = next((u for u in by_name.get(key[0], ()) if u not in used), None)
+        if uid is not None:
+            used.add(uid)
+        out.append(uid)
+    return out
+
+
+def user_time_rows(data, now: datetime | None = None) -> list:
+    """Rows of USER_TIME_HEADERS computed from a display/show_times payload."""
+    return UserTimes(data).rows(now)
@@ -0,0 +1,90 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+
+_NULL = contextlib.nullcontext()
+
+
+class Tracer:
+    """Collects complete ("X") events in Chrome trace-event format.
+
+    The output opens in Perfetto (ui.perfetto.dev) or about://tracing.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.pid = os.getpid()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = "", **args):
+        start = self._now_us()
+        try:
+            yield args  # callers may add args while the span is open
+        finally:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now_us() - start,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self.events.append(event)
+
+    def write(self, path: str) -> None:
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+_tracer = None
+
+
+def enable() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> None:
+    global _tracer
+    _tracer = None
+
+
+def active() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, cat: str = "", **args):
+    """Context manager timing a phase; a no-op unless tracing is enabled."""
+    if _tracer is None:
+        return _NULL
+    return _tracer.span(name, cat, **args)
+
+
+def traced(fn=None, *, cat: str = "cmd"):
+    """Decorator recording a span per call of the wrapped function."""
+    def wrap(f):
+        @functools.wraps(f)
+        def inner(*a, **kw):
+            if _tracer is None:
+                return f(*a, **kw)
+            with _tracer.span(f.__name__, cat):
+                return f(*a, **kw)
+        return inner
+    return wrap(fn) if fn is not None else wrap
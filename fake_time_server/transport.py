@@ -0,0 +1,341 @@
+import http.client
+import select
+import socket
+import ssl
+import threading
+import time
+import zlib
+from collections import deque
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin, urlsplit
+
+import tracing
+
+
+# Errors meaning a kept-alive socket was closed by the server while idle.
+# Raised while sending, the request never reached the application and any
+# method may be resent once. Raised while waiting for the response, the
+# request may already have been applied, so only idempotent methods are.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+
+
+class ConnectError(URLError):
+    """The connection could not be established, so nothing was sent."""
+
+
+def _traced_create_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    # socket.create_connection split into DNS and TCP connect phases for tracing
+    host, port = address
+    with tracing.span("dns", "net", host=host):
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    err = None
+    for family, socktype, proto, _, sockaddr in infos:
+        sock = None
+        try:
+            with tracing.span("tcp_connect", "net", addr=str(sockaddr[0])):
+                sock = socket.socket(family, socktype, proto)
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            err = e
+            if sock is not None:
+                sock.close()
+    raise err if err is not None else OSError(f"getaddrinfo returned nothing for {host}")
+
+
+def _dropped(sock) -> bool:
+    """True if an idle kept-alive socket can't carry the next request.
+
+    An idle HTTP/1.1 socket has nothing to read, so a readable one was
+    closed by the server (EOF) or holds stray bytes. Checked before reuse,
+    so a POST is never written into a socket the server already closed.
+    """
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        if isinstance(sock, ssl.SSLSocket):
+            # May only be a TLS record, e.g. a TLS 1.3 session ticket
+            timeout = sock.gettimeout()
+            sock.settimeout(0)
+            try:
+                sock.recv(1)
+            except ssl.SSLWantReadError:
+                return False
+            finally:
+                sock.settimeout(timeout)
+        return True
+    except (OSError, ValueError):
+        return True
+
+
+class _PooledHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, host, port=None, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self._create_connection = _traced_create_connection
+
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that resumes the last TLS session seen by its pool."""
+
+    def __init__(self, host, port=None, *, pool, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self._pool = pool
+        self._create_connection = _traced_create_connection
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        with tracing.span("tls_handshake", "net") as args:
+            self.sock = self._context.wrap_socket(
+                self.sock,
+                server_hostname=self.host,
+                session=self._pool.tls_session,
+            )
+            if args is not None:
+                args["session_reused"] = self.sock.session_reused
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to a single scheme://host:port."""
+
+    def __init__(self, scheme: str, host: str, port: int | None,
+                 ssl_ctx: ssl.SSLContext | None = None, timeout: float = 6,
+                 maxsize: int = 4, idle_timeout: float = 30.0):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.ssl_ctx = ssl_ctx
+        self.timeout = timeout
+        self.maxsize = max(1, int(maxsize))
+        self.idle_timeout = idle_timeout
+        self.tls_session = None
+        self._idle = deque()  # (connection, released_at)
+        self._lock = threading.Lock()
+
+    def _new_conn(self):
+        if self.scheme == "https":
+            ctx = self.ssl_ctx or ssl.create_default_context()
+            return _PooledHTTPSConnection(self.host, self.port, pool=self,
+                                          timeout=self.timeout, context=ctx)
+        return _PooledHTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _get_conn(self):
+        """Return (connection, reused) - newest live idle connection or a fresh one."""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, released = self._idle.pop()
+                if now - released <= self.idle_timeout and conn.sock is not None and not _dropped(conn.sock):
+                    return conn, True
+                conn.close()
+        return self._new_conn(), False
+
+    def _put_conn(self, conn) -> None:
+        sock = conn.sock
+        if isinstance(sock, ssl.SSLSocket) and sock.session is not None:
+            # TLS 1.3 tickets arrive after the handshake, so grab it late
+            self.tls_session = sock.session
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def urlopen(self, method: str, path: str, body: bytes | None, headers: dict):
+        """Send one request, transparently reconnecting once on a stale socket."""
+        conn, reused = self._get_conn()
+        while True:
+            sent = False
+            try:
+                if conn.sock is None:
+                    try:
+                        with tracing.span("connect", "net"):
+                            conn.connect()
+                    except ssl.SSLError:
+                        raise
+                    except OSError as e:
+                        raise ConnectError(e) from e
+                # Sending the request and waiting for status line and headers
+                with tracing.span("wait_first_byte", "net", reused=reused):
+                    conn.request(method, path, body=body, headers=headers)
+                    sent = True
+                    resp = conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused or (sent and method.upper() not in _IDEMPOTENT_METHODS):
+                    raise
+                conn, reused = self._new_conn(), False
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            return PooledResponse(self, conn, resp)
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+
+
+class PooledResponse:
+    """Context manager around an HTTPResponse that hands its connection back.
+
+    The connection is returned to the pool only when the body was read to the
+    end and the server did not ask to close it; otherwise it is discarded.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn, resp: http.client.HTTPResponse):
+        self._pool = pool
+        self._conn = conn
+        self.resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self.resp.read(amt)
+
+    def release(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self.resp.isclosed() and not self.resp.will_close:
+            self._pool._put_conn(conn)
+        else:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+def iter_decoded(resp, chunk_size: int = 65536):
+    """Yield (decoded_chunk, wire_bytes) pairs, undoing gzip/deflate Content-Encoding."""
+    enc = (resp.headers.get("Content-Encoding") or "").strip().lower()
+    decomp = None
+    while True:
+        chunk = resp.read(chunk_size)
+        if not chunk:
+            break
+        if enc not in ("gzip", "x-gzip", "deflate"):
+            yield chunk, len(chunk)
+            continue
+        if decomp is None:
+            if enc == "deflate":
+                # RFC says zlib-wrapped, some servers send raw deflate
+                zlib_header = len(chunk) >= 2 and chunk[0] & 0x0F == 8 and ((chunk[0] << 8) | chunk[1]) % 31 == 0
+                decomp = zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+            else:
+                decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decomp.decompress(chunk), len(chunk)
+    if decomp is not None:
+        yield decomp.flush(), 0
+
+
+def read_decoded(resp, chunk_size: int = 65536):
+    """Read a whole response body, see iter_decoded.
+
+    Returns (body, wire_bytes). Compressed bodies are inflated chunk by
+    chunk, so the compressed and decoded bodies never both sit in memory.
+    """
+    enc = (resp.headers.get("Content-Encoding") or "").strip().lower()
+    if enc not in ("gzip", "x-gzip", "deflate"):
+        raw = resp.read()
+        return raw, len(raw)
+    out = bytearray()
+    wire = 0
+    for data, n in iter_decoded(resp, chunk_size):
+        out += data
+        wire += n
+    return out, wire
+
+
+class HTTPTransport:
+    """Per-host connection pools behind a urlopen-like call.
+
+    Raises HTTPError for status >= 400 and URLError for socket-level
+    failures, so callers can keep handling errors like with urllib.
+    """
+
+    def __init__(self, ssl_ctx: ssl.SSLContext | None = None, timeout: float = 6,
+                 pool_size: int = 4, idle_timeout: float = 30.0):
+        self.ssl_ctx = ssl_ctx
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool_for(self, scheme: str, host: str, port: int | None) -> ConnectionPool:
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(scheme, host, port, self.ssl_ctx, self.timeout,
+                                      self.pool_size, self.idle_timeout)
+                self._pools[key] = pool
+            return pool
+
+    def urlopen(self, method: str, url: str, body: bytes | None = None,
+                headers: dict | None = None) -> PooledResponse:
+        headers = dict(headers or {})
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise URLError(f"unknown url type: {parts.scheme}")
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            pool = self._pool_for(parts.scheme, parts.hostname, parts.port)
+            try:
+                resp = pool.urlopen(method, path, body, headers)
+            except URLError:
+                raise
+            except (socket.timeout, TimeoutError) as e:
+                raise URLError(e) from e
+            except ssl.SSLError:
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                raise URLError(e) from e
+
+            if resp.status in _REDIRECT_CODES and resp.headers.get("Location"):
+                resp.read()
+                resp.release()
+                url = urljoin(url, resp.headers["Location"])
+                if resp.status == 303 or (resp.status in (301, 302) and method != "HEAD"):
+                    method, body = "GET", None
+                    headers.pop("Content-Type", None)
+                continue
+
+            if resp.status >= 400:
+                resp.read()
+                resp.release()
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return resp
+        raise URLError(f"too many redirects: {url}")
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,126 @@
+import sys
+import time
+from datetime import datetime
+
+from timecalc import USER_TIME_HEADERS, UserTimes, format_stats
+
+
+_RED = "\x1b[31;1m"
+_YELLOW = "\x1b[33m"
+_RESET = "\x1b[0m"
+
+_TOP = 3  # title, header and separator lines above the first row
+
+
+class UserTimesWatch:
+    """Live countdown of display/show_times that repaints only changed cells.
+
+    The payload is fetched once per `sync_interval`, and also as soon as
+    `log_moved()` (polled every `log_interval`) reports new log rows, i.e.
+    an offset changed; in between, remaining times are recomputed locally
+    from the cached start/offset pairs.
+    """
+
+    def __init__(self, api, tick: float = 1.0, sync_interval: float = 30.0,
+                 warn_below: int = 600, out=None, log_moved=None, log_interval: float = 2.0):
+        self.api = api
+        self.tick = tick
+        self.sync_interval = sync_interval
+        self.log_moved = log_moved
+        self.log_interval = log_interval
+        self.warn_below = warn_below
+        self.out = out or sys.stdout
+        self.times = None
+        self.order = []     # indexes into data, sorted by remaining time
+        self.widths = []
+        self.screen = {}    # (row, col) -> cell text currently on screen
+
+    def sync(self, fresh: bool = False) -> bool:
+        cache = getattr(self.api, "cache", None)
+        if fresh and cache is not None:
+            cache.invalidate(("display/show_times",))
+        data = self.api.list_user_times()
+        if data is False or not isinstance(data, list):
+            return False
+        # Starts are parsed once here, every tick is column arithmetic only
+        self.times = UserTimes(data)
+        rows = self.times.rows()
+        order = sorted(range(len(rows)), key=lambda i: (not isinstance(rows[i][4], int), rows[i][4]))
+        widths = self._widths(rows)
+        if order != self.order or widths != self.widths:
+            self.order, self.widths = order, widths
+            self.screen = {}
+        return True
+
+    @staticmethod
+    def _widths(rows) -> list:
+        widths = [len(h) for h in USER_TIME_HEADERS]
+        for r in rows:
+            for i, cell in enumerate(r):
+                widths[i] = max(widths[i], len(str(cell)))
+        return widths
+
+    def _style(self, remaining) -> str:
+        if not isinstance(remaining, int):
+            return ""
+        if remaining == 0:
+            return _RED
+        if remaining < self.warn_below:
+            return _YELLOW
+        return ""
+
+    def _col_x(self, col: int) -> int:
+        # 1-based terminal column of a cell, cells are joined by " | "
+        return 1 + sum(self.widths[:col]) + 3 * col
+
+    def render(self, now: datetime | None = None) -> None:
+        now = now or datetime.now()
+        rows = self.times.rows(now)
+        widths = [max(a, b) for a, b in zip(self.widths, self._widths(rows))]
+        if widths != self.widths:
+            # A counter grew a digit, columns shift
+            self.widths = widths
+            self.screen = {}
+        w = self.out.write
+        if not self.screen:
+            w("\x1b[2J\x1b[H")
+            when = f"sync každých {self.sync_interval:g} s" + (" a po změně v logu" if self.log_moved else "")
+            w(f"In-Time: zbývající časy ({when}, Ctrl+C ukončí)\n")
+            w(" | ".join(h.ljust(self.widths[i]) for i, h in enumerate(USER_TIME_HEADERS)) + "\n")
+            w("-+-".join("-" * x for x in self.widths) + "\n")
+        for line, idx in enumerate(self.order):
+            r = rows[idx]
+            style = self._style(r[4])
+            for col, cell in enumerate(r):
+                text = str(cell).ljust(self.widths[col])
+                key = (line, col)
+                if self.screen.get(key) == (text, style):
+                    continue
+                self.screen[key] = (text, style)
+                if col:
+                    w(f"\x1b[{_TOP + line + 1};{self._col_x(col) - 3}H | ")
+                w(f"\x1b[{_TOP + line + 1};{self._col_x(col)}H{style}{text}{_RESET if style else ''}")
+        w(f"\x1b[{_TOP + len(self.order) + 2};1H\x1b[2K{format_stats(self.times.stats(now))}\n")
+        self.out.flush()
+
+    def run(self) -> int:
+        if not self.sync():
+            return 1
+        if self.log_moved is not None:
+            self.log_moved()  # first call only records the current high-water mark
+        last_sync = last_check = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                moved = False
+                if self.log_moved is not None and now - last_check >= self.log_interval:
+                    moved = self.log_moved()
+                    last_check = now
+                if moved or now - last_sync >= self.sync_interval:
+                    # Offsets changed elsewhere show up here; a new order forces a full repaint
+                    self.sync(fresh=moved)
+                    last_sync = time.monotonic()
+                self.render()
+                time.sleep(self.tick - (time.time() % self.tick))
+        except KeyboardInterrupt:
+            return 0